@@ -1,21 +1,239 @@
-from flask import Flask, request, jsonify, send_file, render_template, make_response
+from flask import Flask, request, jsonify, send_file, render_template, make_response, Response, stream_with_context, g
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 from reportlab.lib.units import inch
 from reportlab.lib.utils import ImageReader
-from reportlab.platypus import Table, TableStyle
-from reportlab.lib import colors
-from io import BytesIO
+from io import BytesIO, RawIOBase
+import os
+import re
+import unicodedata
+import json
+import hashlib
+import time
+import random
+import cProfile
+import tracemalloc
+import zipfile
+import threading
+import multiprocessing
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
-from PIL import Image as PILImage
+import tempfile
+from PIL import Image as PILImage, ImageOps
 from flask_cors import CORS
+from image_cache import ImageCache
+from pdf_cache import PdfCache, canonical_key, content_etag
+import metrics
+from layout import AMPHIBIAN_GUIDE, draw_header
+from render_jobs import JobQueue, QueueFull
 
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "https://vertebrados.iiap.gob.pe"}})
 
 API_BASE = 'https://api.vertebrados.iiap.gob.pe/api/v1/individuals/'
 
+# Descarga de imágenes: hilos compartidos, conexiones por host y plazo total por PDF
+IMAGE_FETCH_WORKERS = int(os.environ.get('IMAGE_FETCH_WORKERS', 8))
+IMAGE_FETCH_PER_HOST = int(os.environ.get('IMAGE_FETCH_PER_HOST', 4))
+IMAGE_FETCH_TIMEOUT = float(os.environ.get('IMAGE_FETCH_TIMEOUT', 10))
+IMAGE_FETCH_DEADLINE = float(os.environ.get('IMAGE_FETCH_DEADLINE', 15))
+# Tiempo máximo de cada descarga: las que quedan fuera del plazo del PDF no siguen ocupando hilos
+IMAGE_FETCH_MAX_TIME = float(os.environ.get('IMAGE_FETCH_MAX_TIME', IMAGE_FETCH_DEADLINE))
+
+# Consulta de individuos en API_BASE: reintentos, caché del JSON y vida en caché HTTP del PDF
+API_TIMEOUT = float(os.environ.get('API_TIMEOUT', 10))
+API_RETRIES = int(os.environ.get('API_RETRIES', 3))
+RECORD_CACHE_TTL = float(os.environ.get('RECORD_CACHE_TTL', 300))
+RECORD_CACHE_MEMORY_BYTES = int(os.environ.get('RECORD_CACHE_MEMORY_BYTES', 16 * 1024 * 1024))
+INDIVIDUAL_PDF_MAX_AGE = int(os.environ.get('INDIVIDUAL_PDF_MAX_AGE', 300))
+
+def build_session(pool_size, retries=0):
+    """Crea una sesión HTTP con keep-alive, un límite de conexiones por host y reintentos opcionales"""
+    session = requests.Session()
+    max_retries = Retry(total=retries, backoff_factor=0.3, status_forcelist=(429, 502, 503, 504),
+                        allowed_methods=('GET',)) if retries else 0
+    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=pool_size, pool_block=True,
+                          max_retries=max_retries)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+http_session = build_session(IMAGE_FETCH_PER_HOST)
+api_session = build_session(IMAGE_FETCH_PER_HOST, retries=API_RETRIES)
+image_executor = ThreadPoolExecutor(max_workers=IMAGE_FETCH_WORKERS, thread_name_prefix='img-fetch')
+
+# Caché de imágenes: memoria LRU + disco, revalidada con ETag/Last-Modified
+IMAGE_CACHE_DIR = os.environ.get('IMAGE_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'pdf-generator-images'))
+IMAGE_CACHE_TTL = float(os.environ.get('IMAGE_CACHE_TTL', 3600))
+IMAGE_CACHE_MEMORY_BYTES = int(os.environ.get('IMAGE_CACHE_MEMORY_BYTES', 64 * 1024 * 1024))
+IMAGE_CACHE_DISK_BYTES = int(os.environ.get('IMAGE_CACHE_DISK_BYTES', 1024 * 1024 * 1024))
+
+image_cache = ImageCache(
+    http_session,
+    timeout=IMAGE_FETCH_TIMEOUT,
+    ttl=IMAGE_CACHE_TTL,
+    memory_budget=IMAGE_CACHE_MEMORY_BYTES,
+    disk_dir=IMAGE_CACHE_DIR or None,
+    disk_budget=IMAGE_CACHE_DISK_BYTES,
+    max_time=IMAGE_FETCH_MAX_TIME,
+)
+
+def fetch_image(url):
+    """Obtiene los bytes de una imagen a través de la caché compartida"""
+    if not url:
+        raise ValueError("URL de imagen vacía")
+    return image_cache.get(url)
+
+# Los registros de la API se guardan con la misma caché (bytes por URL, revalidados con ETag)
+record_cache = ImageCache(
+    api_session,
+    timeout=API_TIMEOUT,
+    ttl=RECORD_CACHE_TTL,
+    memory_budget=RECORD_CACHE_MEMORY_BYTES,
+)
+
+def prefetch_images(record):
+    """Lanza en segundo plano la descarga de las imágenes del registro.
+
+    La caché agrupa las descargas simultáneas de una misma URL, así que cuando
+    create_amphibian_pdf las pide se une a la descarga ya en curso.
+    """
+    for im in safe_get(record, ['files', 'images'], []) or []:
+        url = im.get('name') if isinstance(im, dict) else None
+        if url:
+            image_executor.submit(fetch_image, url)
+
+def fetch_images(urls, deadline=None):
+    """Descarga todas las imágenes en paralelo con un plazo total.
+
+    Devuelve una lista de tuplas (contenido, error) en el mismo orden que `urls`.
+    Las imágenes que no terminan dentro del plazo se devuelven con un TimeoutError;
+    las que aún no empezaron se cancelan y las que están en curso se cortan solas
+    al llegar a IMAGE_FETCH_MAX_TIME.
+    """
+    if deadline is None:
+        deadline = IMAGE_FETCH_DEADLINE
+    futures = [image_executor.submit(fetch_image, url) for url in urls]
+    wait(futures, timeout=deadline)
+
+    results = []
+    for f in futures:
+        if not f.done():
+            f.cancel()
+            results.append((None, TimeoutError(f"Tiempo de descarga excedido ({deadline:g}s)")))
+        elif f.exception() is not None:
+            results.append((None, f.exception()))
+        else:
+            results.append((f.result(), None))
+    return results
+
+# Preparación de imágenes: resolución de impresión y calidad JPEG al incrustar
+IMAGE_TARGET_DPI = float(os.environ.get('IMAGE_TARGET_DPI', 150))
+IMAGE_JPEG_QUALITY = int(os.environ.get('IMAGE_JPEG_QUALITY', 80))
+# Un JPEG original se incrusta tal cual si no supera este factor del tamaño impreso
+IMAGE_PASSTHROUGH_SLACK = 1.25
+
+# Valores EXIF de orientación que intercambian ancho y alto
+EXIF_ORIENTATION = 0x0112
+TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+
+def oriented_size(img):
+    """Tamaño de la imagen tal como se ve tras aplicar la orientación EXIF"""
+    iw, ih = img.size
+    if img.getexif().get(EXIF_ORIENTATION, 1) in TRANSPOSED_ORIENTATIONS:
+        return ih, iw
+    return iw, ih
+
+def prepare_image(img, content, dw, dh, dpi=None, quality=None):
+    """Reduce la imagen al tamaño impreso (dw x dh puntos) y la devuelve lista para reportlab.
+
+    `img` es la imagen ya abierta (sin decodificar) y `content` sus bytes originales.
+    Los JPEG que ya son suficientemente pequeños se incrustan sin recomprimir; el resto
+    se decodifica una sola vez (con `draft()` cuando el formato lo permite), se orienta
+    según EXIF, se aplana sobre blanco si tiene transparencia y se recodifica como JPEG.
+    """
+    dpi = dpi or IMAGE_TARGET_DPI
+    quality = quality or IMAGE_JPEG_QUALITY
+    tw = max(1, round(dw * dpi / 72))
+    th = max(1, round(dh * dpi / 72))
+
+    orientation = img.getexif().get(EXIF_ORIENTATION, 1)
+    iw, ih = oriented_size(img)
+    if (img.format == 'JPEG' and img.mode in ('RGB', 'L') and orientation == 1
+            and iw <= tw * IMAGE_PASSTHROUGH_SLACK and ih <= th * IMAGE_PASSTHROUGH_SLACK):
+        return ImageReader(BytesIO(content))
+
+    # Decodificación reducida para JPEG (escala 1/2, 1/4 u 1/8 en el propio decodificador)
+    img.draft('RGB', (th, tw) if orientation in TRANSPOSED_ORIENTATIONS else (tw, th))
+    img = ImageOps.exif_transpose(img)
+
+    if img.mode in ('RGBA', 'LA', 'P'):
+        img = img.convert('RGBA')
+        background = PILImage.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel('A'))
+        img = background
+    elif img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+
+    if img.width > tw or img.height > th:
+        img = img.resize((min(tw, img.width), min(th, img.height)), PILImage.LANCZOS)
+
+    out = BytesIO()
+    img.save(out, format='JPEG', quality=quality, optimize=True)
+    out.seek(0)
+    return ImageReader(out)
+
+# Caché de PDFs generados (opcional). El pie "Generado el" usa PDF_GENERATED_AT o, si no
+# está definido, la fecha del día, de modo que la salida (y su ETag) es reproducible.
+PDF_CACHE_ENABLED = os.environ.get('PDF_CACHE_ENABLED', '').lower() in ('1', 'true', 'yes')
+PDF_CACHE_DIR = os.environ.get('PDF_CACHE_DIR') or None
+PDF_CACHE_TTL = float(os.environ.get('PDF_CACHE_TTL', 3600))
+PDF_CACHE_MEMORY_BYTES = int(os.environ.get('PDF_CACHE_MEMORY_BYTES', 128 * 1024 * 1024))
+PDF_CACHE_DISK_BYTES = int(os.environ.get('PDF_CACHE_DISK_BYTES', 1024 * 1024 * 1024))
+PDF_GENERATED_AT = os.environ.get('PDF_GENERATED_AT') or None
+
+pdf_cache = PdfCache(
+    memory_budget=PDF_CACHE_MEMORY_BYTES,
+    disk_dir=PDF_CACHE_DIR,
+    disk_budget=PDF_CACHE_DISK_BYTES,
+    ttl=PDF_CACHE_TTL,
+)
+
+# Exportación por lotes: procesos de renderizado y tamaño máximo del lote
+BATCH_WORKERS = int(os.environ.get('BATCH_WORKERS', os.cpu_count() or 1))
+BATCH_MAX_ITEMS = int(os.environ.get('BATCH_MAX_ITEMS', 1000))
+
+# Catálogo multi-registro: reportlab arma el documento entero en memoria antes de
+# escribirlo y el pico ronda 5 veces el tamaño del PDF, que depende sobre todo de las
+# imágenes distintas (~100-250 KB cada una). Los límites lo acotan a unos cientos de MB.
+CATALOG_MAX_ITEMS = int(os.environ.get('CATALOG_MAX_ITEMS', 200))
+CATALOG_MAX_IMAGES = int(os.environ.get('CATALOG_MAX_IMAGES', 400))
+CATALOG_SPOOL_BYTES = int(os.environ.get('CATALOG_SPOOL_BYTES', 8 * 1024 * 1024))
+TOC_LINES_PER_PAGE = 36
+STREAM_CHUNK_BYTES = 64 * 1024
+
+# Trabajos asíncronos: concurrencia, profundidad máxima y vida de los PDF terminados
+JOB_DIR = os.environ.get('JOB_DIR', os.path.join(tempfile.gettempdir(), 'pdf-generator-jobs'))
+JOB_CONCURRENCY = int(os.environ.get('JOB_CONCURRENCY', 2))
+JOB_MAX_DEPTH = int(os.environ.get('JOB_MAX_DEPTH', 50))
+JOB_TTL = float(os.environ.get('JOB_TTL', 3600))
+JOB_RETRY_AFTER = 5
+
+# Perfilado opcional: fracción de peticiones perfiladas (CPU y heap Python del proceso) y umbral
+# para guardar el volcado
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_SLOW_SECONDS = float(os.environ.get('PROFILE_SLOW_SECONDS', 2))
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'pdf-generator-profiles'))
+
+def generated_stamp():
+    """Texto de "Generado el": PDF_GENERATED_AT o la fecha de hoy (sin hora)"""
+    return PDF_GENERATED_AT or datetime.now().strftime('%Y-%m-%d')
+
 def safe_get(d, keys, default=None):
     for key in keys:
         if not d or not isinstance(d, dict):
@@ -23,165 +241,66 @@ def safe_get(d, keys, default=None):
         d = d.get(key)
     return d if d is not None else default
 
-def draw_header(c, width, height, scientific_name):
-    """Dibuja el encabezado minimalista en cada página"""
-    c.setFont('Helvetica', 10)
-    c.drawString(0.5*inch, height-0.5*inch, scientific_name)
-    c.line(0.5*inch, height-0.6*inch, width-0.5*inch, height-0.6*inch)
-
-def create_table(data, col_widths):
-    """Crea una tabla con bordes como la de colectores"""
-    table = Table(data, colWidths=col_widths)
-    table.setStyle(TableStyle([
-        ('ALIGN', (0,0), (0,-1), 'RIGHT'),
-        ('ALIGN', (1,0), (1,-1), 'LEFT'),
-        ('FONTNAME', (0,0), (-1,-1), 'Helvetica'),
-        ('FONTSIZE', (0,0), (-1,-1), 10),
-        ('VALIGN', (0,0), (-1,-1), 'TOP'),
-        ('GRID', (0,0), (-1,-1), 0.5, colors.black),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 4),
-    ]))
-    return table
-
-def create_amphibian_pdf(data):
-    buffer = BytesIO()
-    c = canvas.Canvas(buffer, pagesize=letter)
-    width, height = letter
-    
-    # Obtener datos importantes
-    scientific_name = safe_get(data, ['species', 'scientificName'], 'N/A')
-    common_name = safe_get(data, ['species', 'commonName'], 'N/A')
-    code = data.get('code', 'N/A')
-    
-      # PORTADA MEJORADA
-    c.setFont('Helvetica-Bold', 40)
-    c.drawCentredString(width/2, height/2 + 80, "GUÍA DE ESPECIE")
-    
-    c.setFont('Helvetica', 30)
-    c.setFont('Helvetica-Oblique', 30)
-    c.drawCentredString(width/2, height/2 + 40, scientific_name)
-    c.drawCentredString(width/2, height/2, common_name)
-    
-    c.setFont('Helvetica', 16)
-    c.drawCentredString(width/2, height/2 - 40, f"Código: {code}")
-    
-    # Pie de página
-    c.setFont('Helvetica', 10)
-    c.drawCentredString(width/2, 50, f"Generado el: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+def image_form(c, image_forms, img, content, dw, dh):
+    """Incrusta la imagen como form XObject una sola vez y devuelve su nombre.
+
+    Las imágenes con los mismos bytes y el mismo tamaño impreso reutilizan el
+    mismo objeto, sin volver a decodificarlas ni recomprimirlas.
+    """
+    key = (hashlib.sha256(content).hexdigest(), round(dw, 2), round(dh, 2))
+    name = image_forms.get(key)
+    if name is None:
+        name = f"img{len(image_forms)}_{key[0][:16]}"
+        with metrics.stage('decode'):
+            image = prepare_image(img, content, dw, dh)
+            c.beginForm(name, 0, 0, dw, dh)
+            c.drawImage(image, 0, 0, width=dw, height=dh, preserveAspectRatio=True)
+            c.endForm()
+        image_forms[key] = name
+    return name
+
+def draw_guide_record(c, data, guide=AMPHIBIAN_GUIDE, generated_at=None, image_forms=None, values=None,
+                      after_fetch=None):
+    """Dibuja todas las secciones de un registro sobre el canvas, desde su portada.
+
+    No cierra la última página: quien llama decide entre showPage() y save().
+    `image_forms` permite compartir entre registros las imágenes ya incrustadas y
+    `values` reutiliza el registro ya resuelto con guide.resolve() y `after_fetch`
+    se pasa a draw_images. Devuelve el número de imágenes que no se pudieron incluir.
+    """
+    if image_forms is None:
+        image_forms = {}
+    if values is None:
+        values = guide.resolve(data)
+    if generated_at is None:
+        generated_at = generated_stamp()
+
+    guide.draw_cover(c, values, generated_at)
     c.showPage()
-    
-    # INFORMACIÓN GENERAL (en tabla con bordes)
-    draw_header(c, width, height, scientific_name)
-    y = height - 1*inch
-    
-    c.setFont('Helvetica-Bold', 14)
-    c.drawString(1*inch, y, "INFORMACIÓN GENERAL")
-    y -= 30
-    
-    info_data = [
-        ["Código:", code],
-        ["Nombre científico:", scientific_name],
-        ["Nombre común:", common_name],
-        ["Sexo:", safe_get(data, ['sex', 'name'], 'N/A')],
-        ["Fecha identificación:", f"{data.get('identDate', 'N/A')} {data.get('identTime', '')}"],
-        ["Actividad:", safe_get(data, ['activity', 'name'], 'N/A')],
-        ["Tipo de bosque:", safe_get(data, ['forestType', 'name'], 'N/A')]
-    ]
-    
-    info_table = create_table(info_data, [2*inch, 4*inch])
-    info_table.wrapOn(c, width-2*inch, height)
-    info_table.drawOn(c, 1*inch, y - info_table._height)
-    y -= info_table._height + 20
-    
-    # CLASIFICACIÓN TAXONÓMICA (en tabla con bordes)
-    c.setFont('Helvetica-Bold', 14)
-    c.drawString(1*inch, y, "CLASIFICACIÓN TAXONÓMICA")
-    y -= 30
-    
-    cls = safe_get(data, ['species', 'genus', 'family', 'order', 'class'], {})
-    tax_data = [
-        ["Clase:", cls.get('name', 'N/A')],
-        ["Orden:", safe_get(data, ['species', 'genus', 'family', 'order', 'name'], 'N/A')],
-        ["Familia:", safe_get(data, ['species', 'genus', 'family', 'name'], 'N/A')],
-        ["Género:", safe_get(data, ['species', 'genus', 'name'], 'N/A')],
-        ["Especie:", scientific_name]
-    ]
-    
-    tax_table = create_table(tax_data, [1.5*inch, 4.5*inch])
-    tax_table.wrapOn(c, width-2*inch, height)
-    tax_table.drawOn(c, 1*inch, y - tax_table._height)
-    y -= tax_table._height + 20
-    
-    # UBICACIÓN GEOGRÁFICA (en tabla con bordes)
-    c.setFont('Helvetica-Bold', 14)
-    c.drawString(1*inch, y, "UBICACIÓN GEOGRÁFICA")
-    y -= 30
-    
-    ev = safe_get(data, ['ocurrence', 'event'], {})
-    loc = ev.get('locality', {})
-    dist = loc.get('district', {})
-    prov = dist.get('province', {})
-    dept = prov.get('department', {})
-    country = dept.get('country', {})
-    
-    # Obtener y redondear coordenadas a 5 decimales
-    lat = ev.get('latitude', 'N/A')
-    lon = ev.get('longitude', 'N/A')
-    try:
-        lat_str = f"{float(lat):.5f}"
-    except (TypeError, ValueError):
-        lat_str = 'N/A'
-    try:
-        lon_str = f"{float(lon):.5f}"
-    except (TypeError, ValueError):
-        lon_str = 'N/A'
-
-    loc_data = [
-        ["País:", country.get('name', 'N/A')],
-        ["Departamento:", dept.get('name', 'N/A')],
-        ["Provincia:", prov.get('name', 'N/A')],
-        ["Distrito:", dist.get('name', 'N/A')],
-        ["Localidad:", loc.get('name', 'N/A')],
-        ["Coordenadas:", f"Lat {lat_str}, Long {lon_str}"]
-    ]
-    
-    loc_table = create_table(loc_data, [1.5*inch, 4.5*inch])
-    loc_table.wrapOn(c, width-2*inch, height)
-    loc_table.drawOn(c, 1*inch, y - loc_table._height)
-    y -= loc_table._height + 20
-    
-    # IDENTIFICADORES (en tabla con bordes)
-    identifiers = data.get('identifiers', [])
-    if identifiers:
-        c.setFont('Helvetica-Bold', 14)
-        c.drawString(1*inch, y, "IDENTIFICADORES")
-        y -= 30
-        
-        id_data = [["Nombre", "Email"]]
-        for idf in identifiers:
-            p = idf.get('person', {})
-            name = f"{p.get('firstname', '')} {p.get('lastname', '')}".strip()
-            email = p.get('email', '')
-            id_data.append([name, email])
-        
-        id_table = Table(id_data, colWidths=[3*inch, 3*inch])
-        id_table.setStyle(TableStyle([
-            ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
-            ('TEXTCOLOR', (0,0), (-1,0), colors.black),
-            ('ALIGN', (0,0), (-1,-1), 'LEFT'),
-            ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0,0), (-1,-1), 10),
-            ('GRID', (0,0), (-1,-1), 0.5, colors.black),
-            ('BOTTOMPADDING', (0,0), (-1,-1), 4),
-        ]))
-        
-        id_table.wrapOn(c, width-2*inch, height)
-        id_table.drawOn(c, 1*inch, y - id_table._height)
-        y -= id_table._height + 20
-    
- # IMÁGENES MEJORADAS (mitad superior e inferior)
-    imgs = safe_get(data, ['files', 'images'], [])
+    guide.draw_sections(c, values)
+    return draw_images(c, guide.images(values), guide.name(values), image_forms, after_fetch)
+
+def draw_images(c, imgs, scientific_name, image_forms, after_fetch=None):
+    """Dibuja las imágenes en páginas nuevas, dos por página (mitad superior e inferior).
+
+    Devuelve cuántas se sustituyeron por el aviso de error. `after_fetch` se llama
+    cuando terminan las descargas (o enseguida si no hay imágenes), antes de decodificar.
+    """
+    width, height = letter
+    failed = 0
+    if not imgs and after_fetch is not None:
+        after_fetch()
     if imgs:
+        # Descargar todas las imágenes antes de maquetar
+        with metrics.stage('fetch'):
+            fetched = fetch_images([im.get('name') if isinstance(im, dict) else None for im in imgs])
+        for content, error in fetched:
+            metrics.images_total.inc(result='error' if error is not None else 'ok')
+            if content is not None:
+                metrics.image_bytes_fetched.inc(len(content))
+        if after_fetch is not None:
+            after_fetch()
+
         c.showPage()
         draw_header(c, width, height, scientific_name)
         
@@ -198,13 +317,11 @@ def create_amphibian_pdf(data):
                 c.drawString(1*inch, height-1*inch, "IMÁGENES DEL ESPECIMEN (continuación)")
             
             try:
-                # Descargar imagen
-                r = requests.get(im['name'], timeout=10)
-                r.raise_for_status()
-                buf = BytesIO(r.content)
-                
-                with PILImage.open(buf) as img:
-                    iw, ih = img.size
+                content, error = fetched[i]
+                if error is not None:
+                    raise error
+                with PILImage.open(BytesIO(content)) as img:
+                    iw, ih = oriented_size(img)
                     ar = iw / ih
                     
                     # Determinar posición (superior o inferior)
@@ -228,17 +345,19 @@ def create_amphibian_pdf(data):
                         dh = max_height
                         dw = dh * ar
                     
+                    form_name = image_form(c, image_forms, img, content, dw, dh)
+                    
                     # Dibujar título de la imagen
                     c.setFont('Helvetica-Bold', 12)
                     c.drawString(1*inch, y_position + img_area_height - 20, section_label)
                     
                     # Dibujar imagen centrada horizontalmente
                     x_position = (width - dw) / 2
-                    buf.seek(0)
-                    image = ImageReader(buf)
                     image_top = y_position + img_area_height - 40
-                    c.drawImage(image, x_position, image_top - dh, 
-                                width=dw, height=dh, preserveAspectRatio=True)
+                    c.saveState()
+                    c.translate(x_position, image_top - dh)
+                    c.doForm(form_name)
+                    c.restoreState()
                     
                     # Dibujar nota debajo de la imagen (8px ≈ 6 puntos)
                     nota = im.get('note', '')
@@ -250,14 +369,183 @@ def create_amphibian_pdf(data):
             except Exception as e:
                 c.setFont('Helvetica', 10)
                 error_y = height - 1.5*inch - img_area_height if i % 2 == 0 else page_center - 0.5*inch - img_area_height
-                c.drawString(1*inch, error_y + img_area_height - 20, f"Error al cargar imagen {i+1}: {str(e)}")
+                c.drawString(1*inch, error_y + img_area_height - 20, f"Error al cargar imagen {i+1}: {image_error_message(e)}")
+                failed += 1
+    return failed
+
+def image_error_message(error):
+    """Texto estable del error de una imagen.
+
+    str(e) puede incluir direcciones de memoria (`<_io.BytesIO object at 0x…>`,
+    conexiones de urllib3) y haría que el mismo registro diera bytes y ETag distintos.
+    """
+    if isinstance(error, PILImage.UnidentifiedImageError):
+        return "formato de imagen no reconocido"
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return f"HTTP {error.response.status_code}"
+    if isinstance(error, (TimeoutError, requests.Timeout)):
+        return "tiempo de descarga excedido"
+    if isinstance(error, ValueError):
+        # p. ej. "URL de imagen vacía"
+        return str(error)
+    return type(error).__name__
+
+def create_guide_pdf(data, guide, generated_at=None):
+    """Genera la guía de un registro según el layout `guide`.
 
-    c.save()
-        # Nombre del archivo con el nombre científico
-    filename = f"guia_especie_{scientific_name.replace(' ', '_')}.pdf"
+    El PDF se escribe en modo invariante y "Generado el" es `generated_at` o
+    generated_stamp(), de modo que el mismo registro produce los mismos bytes.
+    Devuelve (buffer, filename, imágenes fallidas).
+    """
+    values = guide.resolve(data)
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter, invariant=True)
+    failed = draw_guide_record(c, data, guide, generated_at, values=values)
+    with metrics.stage('save'):
+        c.save()
+    metrics.pdf_bytes.observe(buffer.getbuffer().nbytes)
+    # Nombre del archivo con el nombre científico
+    filename = guide.filename(values)
     buffer.seek(0)
+    return buffer, filename, failed
+
+def create_amphibian_pdf(data, generated_at=None):
+    """Genera la guía de especie de un anfibio"""
+    buffer, filename, _ = create_guide_pdf(data, AMPHIBIAN_GUIDE, generated_at)
     return buffer, filename
 
+def draw_catalog_toc(c, guide, values_list, first_pages, title, toc_pages):
+    """Dibuja el índice del catálogo con enlaces a la portada de cada registro"""
+    width, height = letter
+    for page in range(toc_pages):
+        draw_header(c, width, height, title)
+        c.setFont('Helvetica-Bold', 14)
+        label = "CONTENIDO" if page == 0 else "CONTENIDO (continuación)"
+        c.drawString(1*inch, height-1*inch, label)
+        y = height - 1.5*inch
+
+        chunk = range(page * TOC_LINES_PER_PAGE, min(len(values_list), (page + 1) * TOC_LINES_PER_PAGE))
+        for k in chunk:
+            entry = f"{k+1}. {guide.entry_label(values_list[k])}"
+            c.setFont('Helvetica', 10)
+            c.drawString(1*inch, y, entry)
+            c.drawRightString(width - 1*inch, y, str(first_pages[k]))
+            c.linkAbsolute(entry, f"rec{k}", Rect=(1*inch, y - 3, width - 1*inch, y + 10), thickness=0)
+            y -= 16
+        c.showPage()
+
+def create_catalog_pdf(records, title="CATÁLOGO DE ESPECÍMENES", generated_at=None, guide=AMPHIBIAN_GUIDE):
+    """Genera un catálogo con varios registros en un único PDF.
+
+    Incluye portada, índice con enlaces y marcadores (outline) por registro. Las
+    imágenes idénticas se incrustan una sola vez y se comparten entre registros.
+
+    La memoria no es constante: reportlab guarda todas las páginas e imágenes hasta
+    save() y entonces serializa el documento completo en un único bytes. El
+    SpooledTemporaryFile (a disco al superar CATALOG_SPOOL_BYTES) sólo evita retener
+    esos bytes mientras se envía la respuesta; el tamaño lo limitan CATALOG_MAX_ITEMS
+    y CATALOG_MAX_IMAGES. Quien llama debe cerrar el fichero.
+    """
+    width, height = letter
+    if generated_at is None:
+        generated_at = generated_stamp()
+
+    # Las páginas de cada registro se conocen de antemano, así que el índice puede ir al principio
+    values_list = [guide.resolve(data) for data in records]
+    toc_pages = max(1, (len(records) + TOC_LINES_PER_PAGE - 1) // TOC_LINES_PER_PAGE)
+    first_pages = []
+    page = 2 + toc_pages
+    for values in values_list:
+        first_pages.append(page)
+        page += guide.page_count(values)
+
+    output = tempfile.SpooledTemporaryFile(max_size=CATALOG_SPOOL_BYTES)
+    c = canvas.Canvas(output, pagesize=letter, invariant=True)
+    c.setTitle(title)
+    c.showOutline()
+
+    # Portada del catálogo
+    c.setFont('Helvetica-Bold', 30)
+    c.drawCentredString(width/2, height/2 + 40, title)
+    c.setFont('Helvetica', 16)
+    c.drawCentredString(width/2, height/2, f"{len(records)} registros")
+    c.setFont('Helvetica', 10)
+    c.drawCentredString(width/2, 50, f"Generado el: {generated_at}")
+    c.bookmarkPage('cover')
+    c.showPage()
+
+    c.bookmarkPage('contents')
+    c.addOutlineEntry("Contenido", 'contents', level=0)
+    draw_catalog_toc(c, guide, values_list, first_pages, title, toc_pages)
+
+    image_forms = {}
+    for k, data in enumerate(records):
+        # Las imágenes del siguiente registro se piden cuando este ya tiene las suyas, para
+        # que no compitan con ellas por hilos y conexiones; se bajan mientras se decodifican
+        after_fetch = None
+        if k + 1 < len(records):
+            after_fetch = lambda record=records[k + 1]: prefetch_images(record)
+
+        c.bookmarkPage(f"rec{k}")
+        c.addOutlineEntry(guide.entry_label(values_list[k]), f"rec{k}", level=0)
+        draw_guide_record(c, data, guide, generated_at, image_forms, values=values_list[k],
+                          after_fetch=after_fetch)
+        c.showPage()
+
+    with metrics.stage('save'):
+        c.save()
+    metrics.pdf_bytes.observe(output.tell())
+    output.seek(0)
+    filename = safe_filename(f"catalogo_{title}.pdf")
+    return output, filename
+
+def stream_file(fh):
+    """Envía un fichero por partes y lo cierra al terminar"""
+    try:
+        while True:
+            chunk = fh.read(STREAM_CHUNK_BYTES)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        fh.close()
+
+def pdf_response(data, max_age=None):
+    """Renderiza (o toma de la caché) el PDF del registro y arma la respuesta con ETag.
+
+    Un PDF con imágenes que no se pudieron cargar no se guarda en caché y se envía
+    con no-store; el resto lleva `Cache-Control: public` si se indica `max_age`.
+    """
+    cached = None
+    failed = 0
+    stamp = generated_stamp()
+    if PDF_CACHE_ENABLED:
+        key = canonical_key(data, stamp, IMAGE_TARGET_DPI, IMAGE_JPEG_QUALITY)
+        cached = pdf_cache.get(key)
+
+    if cached is not None:
+        etag, filename, content = cached
+    else:
+        pdf, filename, failed = create_guide_pdf(data, AMPHIBIAN_GUIDE, generated_at=stamp)
+        content = pdf.getvalue()
+        etag = content_etag(content)
+        if PDF_CACHE_ENABLED and not failed:
+            pdf_cache.put(key, etag, filename, content)
+
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    else:
+        with metrics.stage('response'):
+            response = make_response(content)
+        response.headers.set('Content-Type', 'application/pdf')
+        response.headers.set('Content-Disposition', f'attachment; filename=registro_{filename}.pdf')
+    response.set_etag(etag)
+    if failed:
+        response.headers.set('Cache-Control', 'no-store')
+    elif max_age is not None:
+        response.headers.set('Cache-Control', f'public, max-age={max_age}')
+    return response
+
 @app.route('/generate-pdf-from-data', methods=['POST'])
 def generate_pdf_from_data():
     try:
@@ -265,14 +553,378 @@ def generate_pdf_from_data():
         if not data:
             return jsonify({"error": "No se recibió contenido JSON"}), 400
         
-        pdf, filename = create_amphibian_pdf(data)
-        response = make_response(pdf.read())
-        response.headers.set('Content-Type', 'application/pdf')
-        response.headers.set('Content-Disposition', f'attachment; filename=registro_{filename}.pdf')
+        return pdf_response(data)
+    except Exception as e:
+        return jsonify({"error": f"Error al generar PDF: {e}"}), 500
+
+# cProfile y tracemalloc son globales al proceso: sólo se perfila una petición a la vez
+profile_lock = threading.Lock()
+
+def start_profile():
+    """Empieza a perfilar la petición actual: cProfile y, mientras dura, tracemalloc.
+
+    tracemalloc es global, así que el pico incluye lo que asignen a la vez los demás
+    hilos del proceso; es un pico del proceso durante la petición, no de la petición.
+
+    Si ya hay otra petición perfilándose, o cualquier otra herramienta de perfilado
+    activa (Python 3.12+ lanza ValueError), la muestra se descarta.
+    """
+    if not profile_lock.acquire(blocking=False):
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        profile_lock.release()
+        return
+    g.profiler = profiler
+    g.trace_memory = not tracemalloc.is_tracing()
+    if g.trace_memory:
+        tracemalloc.start()
+
+def stop_profile():
+    """Detiene el perfilado si estaba activo; devuelve (profiler, pico del heap) o (None, None)"""
+    profiler = g.pop('profiler', None)
+    if profiler is None:
+        return None, None
+    profiler.disable()
+    peak = None
+    if g.pop('trace_memory', False):
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    profile_lock.release()
+    return profiler, peak
+
+@app.before_request
+def start_request_metrics():
+    g.metrics_token = metrics.start_request()
+    g.request_started = time.perf_counter()
+    if PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE:
+        start_profile()
+
+@app.after_request
+def finish_request_metrics(response):
+    if 'metrics_token' not in g:
         return response
+    total = time.perf_counter() - g.request_started
+    timings = metrics.end_request(g.pop('metrics_token'))
+    timings['total'] = total
+    response.headers.set('Server-Timing', metrics.server_timing(timings))
+    endpoint = request.endpoint or 'unknown'
+    metrics.request_seconds.observe(total, endpoint=endpoint)
+
+    profiler, peak = stop_profile()
+    if peak is not None:
+        metrics.sampled_heap_peak_bytes.observe(peak, endpoint=endpoint)
+    if profiler is not None and total >= PROFILE_SLOW_SECONDS:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        name = f"{endpoint}-{int(time.time())}-{int(total * 1000)}ms.prof"
+        profiler.dump_stats(os.path.join(PROFILE_DIR, name))
+    return response
+
+@app.teardown_request
+def release_profiler(exc):
+    # after_request no se ejecuta si la vista lanza una excepción no controlada
+    stop_profile()
+
+@app.route('/metrics')
+def prometheus_metrics():
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
+
+def fetch_individual(individual_id):
+    """Obtiene el registro de un individuo desde API_BASE (con caché)"""
+    record = json.loads(record_cache.get(f"{API_BASE}{quote(str(individual_id), safe='')}"))
+    # La API puede envolver el registro en {"data": {...}}
+    if isinstance(record, dict) and isinstance(record.get('data'), dict):
+        record = record['data']
+    if not isinstance(record, dict):
+        raise ValueError(f"Respuesta inesperada de la API para el individuo {individual_id}")
+    return record
+
+def render_batch_item(item, generated_at=None):
+    """Renderiza un elemento del lote (registro completo o ID) en un proceso del pool"""
+    record = item if isinstance(item, dict) else fetch_individual(item)
+    pdf, filename = create_amphibian_pdf(record, generated_at=generated_at)
+    return filename, pdf.getvalue()
+
+render_pool = None
+render_pool_lock = threading.Lock()
+
+def get_render_pool():
+    """Pool de procesos compartido, creado en el primer uso.
+
+    Se usa 'spawn' porque el proceso padre ya tiene hilos (descarga de imágenes)
+    y hacer fork con hilos activos no es seguro.
+    """
+    global render_pool
+    with render_pool_lock:
+        if render_pool is None:
+            render_pool = ProcessPoolExecutor(max_workers=BATCH_WORKERS,
+                                              mp_context=multiprocessing.get_context('spawn'))
+        return render_pool
+
+def reset_render_pool(pool):
+    """Descarta un pool roto (murió un proceso) para que el siguiente uso cree otro"""
+    global render_pool
+    with render_pool_lock:
+        if render_pool is pool:
+            render_pool = None
+    pool.shutdown(wait=False)
+
+def submit_render(item, generated_at):
+    """Envía el elemento al pool y devuelve (pool, future).
+
+    Si el pool está roto lo recrea y lo intenta una vez más.
+    """
+    pool = get_render_pool()
+    try:
+        return pool, pool.submit(render_batch_item, item, generated_at)
+    except BrokenProcessPool:
+        reset_render_pool(pool)
+        pool = get_render_pool()
+        return pool, pool.submit(render_batch_item, item, generated_at)
+
+def safe_filename(name, default='registro.pdf'):
+    """Nombre de fichero plano: sólo letras, dígitos, '_', '-' y '.', sin '..'"""
+    name = re.sub(r'[^\w.-]+', '_', name)
+    return re.sub(r'\.{2,}', '.', name).strip('._') or default
+
+def content_disposition(filename):
+    """Valor de Content-Disposition con alternativa ASCII y filename* UTF-8 (RFC 6266)"""
+    filename = safe_filename(filename)
+    ascii_name = unicodedata.normalize('NFKD', filename).encode('ascii', 'ignore').decode('ascii')
+    value = f'attachment; filename="{safe_filename(ascii_name)}"'
+    if ascii_name != filename:
+        value += f"; filename*=UTF-8''{quote(filename)}"
+    return value
+
+def zip_entry_name(index, filename):
+    """Nombre plano y seguro dentro del ZIP: sin separadores de ruta ni '..'"""
+    return f"{index:04d}_{safe_filename(filename)}"
+
+class ZipStream(RawIOBase):
+    """Destino no posicionable para zipfile que acumula lo escrito hasta leerlo con pop()"""
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.chunks.append(bytes(b))
+        return len(b)
+
+    def pop(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+def batch_entry(index, item, **fields):
+    """Entrada de manifest.json para el elemento `index` del lote"""
+    entry = {'index': index}
+    if not isinstance(item, dict):
+        entry['id'] = item
+    entry.update(fields)
+    return entry
+
+def stream_batch_zip(items, generated_at=None):
+    """Genera el ZIP del lote por partes, añadiendo cada PDF según va terminando.
+
+    Sólo hay como máximo 2 * BATCH_WORKERS elementos en vuelo, así que la memoria no
+    depende del tamaño del lote. Los errores de cada elemento se anotan en manifest.json,
+    también los de los elementos en vuelo si muere un proceso del pool.
+    """
+    sink = ZipStream()
+    manifest = []
+    pending = {}
+    todo = iter(enumerate(items, start=1))
+    window = 2 * BATCH_WORKERS
+
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_STORED) as zf:
+        while True:
+            for index, item in todo:
+                try:
+                    pool, future = submit_render(item, generated_at)
+                except Exception as e:
+                    manifest.append(batch_entry(index, item, status='error', error=str(e)))
+                    continue
+                pending[future] = (index, item, pool)
+                if len(pending) >= window:
+                    break
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, item, pool = pending.pop(future)
+                entry = batch_entry(index, item)
+                try:
+                    filename, content = future.result()
+                except BrokenProcessPool as e:
+                    # El resto de elementos de ese pool fallarán igual; los siguientes van a uno nuevo
+                    reset_render_pool(pool)
+                    entry.update(status='error', error=f"Proceso de renderizado terminado: {e}")
+                except Exception as e:
+                    entry.update(status='error', error=str(e))
+                else:
+                    name = zip_entry_name(index, filename)
+                    zf.writestr(name, content)
+                    entry.update(status='ok', file=name, size=len(content))
+                manifest.append(entry)
+                yield sink.pop()
+
+        manifest.sort(key=lambda e: e['index'])
+        zf.writestr('manifest.json', json.dumps(manifest, ensure_ascii=False, indent=2))
+    yield sink.pop()
+
+@app.route('/generate-pdf-batch', methods=['POST'])
+def generate_pdf_batch():
+    """Recibe {"individuals": [...]} y/o {"ids": [...]} (o una lista) y devuelve un ZIP"""
+    data = request.get_json(force=True, silent=True)
+    if isinstance(data, list):
+        items = data
+    elif isinstance(data, dict):
+        items = list(data.get('individuals') or []) + list(data.get('ids') or [])
+    else:
+        items = []
+
+    if not items:
+        return jsonify({"error": "No se recibieron individuos"}), 400
+    if len(items) > BATCH_MAX_ITEMS:
+        return jsonify({"error": f"El lote supera el máximo de {BATCH_MAX_ITEMS} individuos"}), 413
+
+    response = Response(stream_with_context(stream_batch_zip(items, PDF_GENERATED_AT)),
+                        mimetype='application/zip')
+    response.headers.set('Content-Disposition', 'attachment; filename=guias_especies.zip')
+    return response
+
+@app.route('/generate-catalog', methods=['POST'])
+def generate_catalog():
+    """Recibe {"title": ..., "individuals": [...], "ids": [...]} y devuelve un único PDF"""
+    data = request.get_json(force=True, silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "No se recibió contenido JSON"}), 400
+    records = data.get('individuals') or []
+    ids = data.get('ids') or []
+    title = data.get('title') or "CATÁLOGO DE ESPECÍMENES"
+    if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+        return jsonify({"error": "'individuals' debe ser una lista de registros"}), 400
+    if not isinstance(ids, list) or not all(isinstance(i, (str, int)) and not isinstance(i, bool) for i in ids):
+        return jsonify({"error": "'ids' debe ser una lista de identificadores"}), 400
+    if not isinstance(title, str):
+        return jsonify({"error": "'title' debe ser un texto"}), 400
+    records = list(records)
+
+    if not records and not ids:
+        return jsonify({"error": "No se recibieron individuos"}), 400
+    if len(records) + len(ids) > CATALOG_MAX_ITEMS:
+        return jsonify({"error": f"El catálogo supera el máximo de {CATALOG_MAX_ITEMS} individuos"}), 413
+
+    try:
+        records += [fetch_individual(individual_id) for individual_id in ids]
+    except (requests.RequestException, ValueError) as e:
+        return jsonify({"error": f"Error al consultar la API: {e}"}), 502
+
+    # Cota superior: las imágenes repetidas se incrustan una vez, pero aquí aún no se han descargado
+    urls = {im.get('name') for data in records
+            for im in safe_get(data, ['files', 'images'], []) or [] if isinstance(im, dict)}
+    urls.discard(None)
+    if len(urls) > CATALOG_MAX_IMAGES:
+        return jsonify({"error": f"El catálogo supera el máximo de {CATALOG_MAX_IMAGES} imágenes distintas"}), 413
+
+    try:
+        output, filename = create_catalog_pdf(records, title, generated_at=PDF_GENERATED_AT)
     except Exception as e:
         return jsonify({"error": f"Error al generar PDF: {e}"}), 500
 
+    response = Response(stream_file(output), mimetype='application/pdf')
+    response.headers.set('Content-Disposition', content_disposition(filename))
+    return response
+
+job_queue = JobQueue(
+    lambda record: create_amphibian_pdf(record, generated_at=PDF_GENERATED_AT),
+    JOB_DIR,
+    concurrency=JOB_CONCURRENCY,
+    max_depth=JOB_MAX_DEPTH,
+    ttl=JOB_TTL,
+)
+
+@app.route('/individuals/<individual_id>/pdf')
+def individual_pdf(individual_id):
+    try:
+        data = fetch_individual(individual_id)
+    except requests.HTTPError as e:
+        if e.response is not None and e.response.status_code == 404:
+            return jsonify({"error": f"Individuo {individual_id} no encontrado"}), 404
+        return jsonify({"error": f"Error al consultar la API: {e}"}), 502
+    except (requests.RequestException, ValueError) as e:
+        return jsonify({"error": f"Error al consultar la API: {e}"}), 502
+
+    try:
+        return pdf_response(data, max_age=INDIVIDUAL_PDF_MAX_AGE)
+    except Exception as e:
+        return jsonify({"error": f"Error al generar PDF: {e}"}), 500
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    data = request.get_json(force=True, silent=True)
+    if not data or not isinstance(data, dict):
+        return jsonify({"error": "No se recibió contenido JSON"}), 400
+    try:
+        job_id = job_queue.submit(data)
+    except QueueFull:
+        response = jsonify({"error": "La cola de generación está llena, inténtelo más tarde"})
+        response.status_code = 429
+        response.headers.set('Retry-After', str(JOB_RETRY_AFTER))
+        return response
+    except Exception as e:
+        return jsonify({"error": f"Error al encolar el trabajo: {e}"}), 500
+    return jsonify({
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/jobs/{job_id}",
+        "download_url": f"/jobs/{job_id}/pdf",
+    }), 202
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job_queue.sweep()
+    job = job_queue.status(job_id)
+    if job is None:
+        return jsonify({"error": "Trabajo no encontrado"}), 404
+    return jsonify(job)
+
+@app.route('/jobs/<job_id>/pdf')
+def job_download(job_id):
+    job = job_queue.status(job_id)
+    if job is None:
+        return jsonify({"error": "Trabajo no encontrado"}), 404
+    if job['status'] == 'error':
+        return jsonify({"error": f"Error al generar PDF: {job.get('error')}"}), 500
+    if job['status'] != 'done':
+        response = jsonify({"error": "El PDF aún no está listo", "status": job['status']})
+        response.status_code = 409
+        response.headers.set('Retry-After', '1')
+        return response
+    return send_file(job_queue.pdf_path(job_id), mimetype='application/pdf',
+                     as_attachment=True, download_name=f"registro_{job['filename']}")
+
+@app.route('/jobs/metrics')
+def job_metrics():
+    return jsonify(job_queue.metrics())
+
+@app.route('/image-cache/stats')
+def image_cache_stats():
+    return jsonify(image_cache.stats())
+
+@app.route('/record-cache/stats')
+def record_cache_stats():
+    return jsonify(record_cache.stats())
+
+@app.route('/pdf-cache/stats')
+def pdf_cache_stats():
+    return jsonify(pdf_cache.stats())
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -0,0 +1,343 @@
+"""Benchmark reproducible de la generación de PDFs.
+
+Levanta un servidor HTTP local que sirve imágenes sintéticas (con latencia y
+tasa de fallos configurables), genera registros sintéticos con distinto número
+y resolución de imágenes, longitud de identificadores y contenido Unicode, y
+mide `create_amphibian_pdf` directamente y la ruta `/generate-pdf-from-data`
+con N clientes concurrentes del test client de Flask.
+
+Cada escenario y modo se ejecuta en un proceso propio, de modo que el pico de
+RSS informado es el de esa medición y no el acumulado de las anteriores. Con la
+caché fría, cada petición a la ruta usa URLs de imagen propias, igual que el
+modo directo vacía la caché antes de cada renderizado.
+
+Uso:
+    python benchmark.py --iterations 10 --clients 4 --output bench.json
+    python benchmark.py --baseline bench.json --threshold 0.15
+
+Con --baseline compara p50/p95 y tamaño de salida contra una ejecución guardada
+y termina con código 1 si alguna métrica empeora más que el umbral.
+"""
+import argparse
+import copy
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+# La caché de imágenes en disco no debe arrastrar resultados entre ejecuciones. Los
+# procesos hijos heredan la variable, así que sólo el proceso principal la crea y la borra.
+BENCH_CACHE_DIR = None
+if 'IMAGE_CACHE_DIR' not in os.environ:
+    BENCH_CACHE_DIR = os.environ['IMAGE_CACHE_DIR'] = tempfile.mkdtemp(prefix='pdf-bench-images-')
+
+from PIL import Image as PILImage
+
+import app
+import metrics
+
+SCENARIOS = {
+    'sin_imagenes':        dict(images=0,  size=(800, 600),   identifiers=1,  unicode=False),
+    'pocas_pequenas':      dict(images=2,  size=(800, 600),   identifiers=1,  unicode=False),
+    'muchas_pequenas':     dict(images=8,  size=(800, 600),   identifiers=1,  unicode=False),
+    'pocas_grandes':       dict(images=2,  size=(4000, 3000), identifiers=1,  unicode=False),
+    'maximo_grandes':      dict(images=20, size=(4000, 3000), identifiers=1,  unicode=False),
+    'identificadores':     dict(images=2,  size=(800, 600),   identifiers=40, unicode=False),
+    'unicode':             dict(images=2,  size=(800, 600),   identifiers=5,  unicode=True),
+}
+
+UNICODE_WORDS = ['Ñandú', 'Pérez', 'Güémez', 'Núñez', 'Àçcéñtø', 'Çaña', 'Ölçer', 'Þórr']
+
+
+# ------------------------------------------------------------ servidor stub
+
+class ImageStub:
+    """Servidor HTTP local que sirve JPEGs sintéticos en /img/<ancho>x<alto>/<n>.jpg"""
+
+    def __init__(self, latency=0.0, failure_rate=0.0, seed=0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.seed = seed
+        self._lock = threading.Lock()
+        self._images = {}
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                stub.handle(self)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def image(self, width, height, n):
+        key = (width, height, n)
+        with self._lock:
+            content = self._images.get(key)
+        if content is None:
+            # Degradado con ruido determinista: comprime como una foto real, no como un color plano
+            rng = random.Random(f"{width}x{height}/{n}")
+            gradient = PILImage.linear_gradient('L').resize((width, height))
+            noise = PILImage.frombytes('L', (width // 4, height // 4), rng.randbytes(width * height // 16))
+            noise = noise.resize((width, height))
+            img = PILImage.merge('RGB', (gradient, noise, gradient.transpose(PILImage.FLIP_LEFT_RIGHT)))
+            buf = BytesIO()
+            img.save(buf, format='JPEG', quality=90)
+            content = buf.getvalue()
+            with self._lock:
+                self._images[key] = content
+        return content
+
+    def handle(self, request):
+        if self.latency:
+            time.sleep(self.latency)
+        # El fallo depende sólo de la ruta (sin la query), así que se repite igual en cada ejecución
+        path = request.path.split('?')[0]
+        fail = random.Random(f"{self.seed}:{path}").random() < self.failure_rate
+        parts = path.strip('/').split('/')
+        if fail or len(parts) != 3 or parts[0] != 'img':
+            request.send_response(500 if fail else 404)
+            request.send_header('Content-Length', '0')
+            request.end_headers()
+            return
+        width, height = (int(v) for v in parts[1].split('x'))
+        content = self.image(width, height, int(parts[2].split('.')[0]))
+        request.send_response(200)
+        request.send_header('Content-Type', 'image/jpeg')
+        request.send_header('Content-Length', str(len(content)))
+        request.end_headers()
+        request.wfile.write(content)
+
+
+# ------------------------------------------------------ registros sintéticos
+
+def make_record(base_url, rng, images, size, identifiers, unicode):
+    def word():
+        return rng.choice(UNICODE_WORDS) if unicode else f"Nombre{rng.randint(0, 999)}"
+
+    width, height = size
+    return {
+        'code': f"BENCH-{rng.randint(0, 99999):05d}",
+        'identDate': '2024-05-01',
+        'identTime': '10:30',
+        'sex': {'name': 'Macho'},
+        'activity': {'name': 'Nocturna'},
+        'forestType': {'name': 'Bosque de várzea' if unicode else 'Bosque'},
+        'species': {
+            'scientificName': f"Boana {word().lower()}",
+            'commonName': f"Rana {word()}",
+            'genus': {'name': 'Boana', 'family': {'name': 'Hylidae', 'order': {
+                'name': 'Anura', 'class': {'name': 'Amphibia'}}}},
+        },
+        'ocurrence': {'event': {
+            'latitude': -3.7 - rng.random(), 'longitude': -73.2 - rng.random(),
+            'locality': {'name': f"Quebrada {word()}", 'district': {'name': 'Iquitos', 'province': {
+                'name': 'Maynas', 'department': {'name': 'Loreto', 'country': {'name': 'Perú'}}}}},
+        }},
+        'identifiers': [
+            {'person': {'firstname': word(), 'lastname': word(), 'email': f"persona{i}@iiap.gob.pe"}}
+            for i in range(identifiers)
+        ],
+        'files': {'images': [
+            {'name': f"{base_url}/img/{width}x{height}/{i}.jpg", 'note': f"Vista {i + 1} {word()}"}
+            for i in range(images)
+        ]},
+    }
+
+
+def with_image_tag(record, tag):
+    """Copia del registro con URLs de imagen únicas: cada renderizado empieza con la caché fría"""
+    record = copy.deepcopy(record)
+    for im in record['files']['images']:
+        im['name'] = f"{im['name']}?r={tag}"
+    return record
+
+
+# ---------------------------------------------------------------- medición
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * q
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def summarize(latencies, sizes, wall):
+    return {
+        'requests': len(latencies),
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'mean_ms': statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        'throughput_rps': len(latencies) / wall if wall else 0.0,
+        'output_bytes': statistics.fmean(sizes) if sizes else 0.0,
+        # El proceso sólo ejecuta esta medición (ver run_measurement)
+        'peak_rss_bytes': metrics.peak_rss_bytes(),
+    }
+
+
+def reset_caches(warm):
+    if not warm:
+        app.image_cache.clear()
+
+
+def bench_direct(records, warm):
+    latencies, sizes = [], []
+    start = time.perf_counter()
+    for record in records:
+        reset_caches(warm)
+        t = time.perf_counter()
+        pdf, _ = app.create_amphibian_pdf(record, generated_at='benchmark')
+        latencies.append(time.perf_counter() - t)
+        sizes.append(len(pdf.getvalue()))
+    return summarize(latencies, sizes, time.perf_counter() - start)
+
+
+def bench_route(records, clients, warm):
+    latencies, sizes = [], []
+    lock = threading.Lock()
+    reset_caches(warm)
+
+    def worker(chunk):
+        client = app.app.test_client()
+        for record in chunk:
+            t = time.perf_counter()
+            r = client.post('/generate-pdf-from-data', json=record)
+            elapsed = time.perf_counter() - t
+            if r.status_code != 200:
+                raise RuntimeError(f"/generate-pdf-from-data devolvió {r.status_code}: {r.data[:200]!r}")
+            with lock:
+                latencies.append(elapsed)
+                sizes.append(len(r.data))
+
+    chunks = [records[i::clients] for i in range(clients)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        for future in [pool.submit(worker, chunk) for chunk in chunks]:
+            future.result()
+    return summarize(latencies, sizes, time.perf_counter() - start)
+
+
+def run_measurement(name, mode, base_url, args):
+    """Mide un escenario en un modo ('direct' o 'route'); se ejecuta en un proceso nuevo"""
+    spec = SCENARIOS[name]
+    rng = random.Random(f"{args.seed}:{name}")
+    records = [make_record(base_url, rng, **spec) for _ in range(args.iterations)]
+    # Calentamiento: genera las imágenes del stub e importa fuentes de reportlab
+    app.create_amphibian_pdf(records[0], generated_at='benchmark')
+
+    if mode == 'direct':
+        return bench_direct(records, args.warm_cache)
+    if args.warm_cache:
+        route_records = records * args.clients
+    else:
+        route_records = [with_image_tag(record, f"{rep}-{k}")
+                         for rep in range(args.clients) for k, record in enumerate(records)]
+    return bench_route(route_records, args.clients, args.warm_cache)
+
+
+def run(args):
+    results = {}
+    spawn = multiprocessing.get_context('spawn')
+    with ImageStub(args.latency_ms / 1000, args.failure_rate, args.seed) as stub:
+        for name in SCENARIOS:
+            if args.scenario and name not in args.scenario:
+                continue
+            results[name] = {}
+            for mode in ('direct', 'route'):
+                with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+                    stats = pool.submit(run_measurement, name, mode, stub.base_url, args).result()
+                results[name][mode] = stats
+                print(f"{name:18} {mode:7} p50={stats['p50_ms']:8.1f}ms p95={stats['p95_ms']:8.1f}ms "
+                      f"p99={stats['p99_ms']:8.1f}ms {stats['throughput_rps']:7.2f} req/s "
+                      f"{stats['output_bytes'] / 1024:9.1f} KiB rss={stats['peak_rss_bytes'] / 2**20:.0f} MiB")
+
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'args': vars(args),
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold):
+    """Devuelve la lista de regresiones frente a la ejecución de referencia"""
+    regressions = []
+    for name, modes in current['results'].items():
+        for mode, stats in modes.items():
+            base = baseline.get('results', {}).get(name, {}).get(mode)
+            if not base:
+                continue
+            for metric in ('p50_ms', 'p95_ms', 'output_bytes'):
+                if base[metric] and stats[metric] > base[metric] * (1 + threshold):
+                    regressions.append(
+                        f"{name}/{mode} {metric}: {base[metric]:.1f} -> {stats[metric]:.1f} "
+                        f"(+{(stats[metric] / base[metric] - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--iterations', type=int, default=10, help='registros por escenario')
+    parser.add_argument('--clients', type=int, default=4, help='clientes concurrentes contra la ruta')
+    parser.add_argument('--latency-ms', type=float, default=0, help='latencia del servidor de imágenes')
+    parser.add_argument('--failure-rate', type=float, default=0, help='fracción de imágenes que fallan')
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='limitar a uno o varios escenarios')
+    parser.add_argument('--warm-cache', action='store_true', help='no vaciar la caché de imágenes')
+    parser.add_argument('--output', help='guardar los resultados en este JSON')
+    parser.add_argument('--baseline', help='JSON de referencia con el que comparar')
+    parser.add_argument('--threshold', type=float, default=0.10, help='empeoramiento tolerado (0.10 = 10%%)')
+    args = parser.parse_args(argv)
+
+    try:
+        result = run(args)
+    finally:
+        if BENCH_CACHE_DIR:
+            shutil.rmtree(BENCH_CACHE_DIR, ignore_errors=True)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fh:
+            json.dump(result, fh, indent=2, ensure_ascii=False)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as fh:
+            baseline = json.load(fh)
+        regressions = compare(result, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESIÓN {line}")
+        if regressions:
+            return 1
+        print("Sin regresiones frente a la referencia")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
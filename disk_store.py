@@ -0,0 +1,101 @@
+"""Piezas comunes de los almacenes en disco (cachés de imágenes y PDFs, cola de trabajos).
+
+- `atomic_write` escribe vía un temporal en el mismo directorio y os.replace, así
+  que un lector nunca ve un fichero a medias.
+- `DiskIndex` lleva el tamaño de cada entrada en orden LRU y decide qué claves
+  desalojar para no pasar del presupuesto en bytes. No toca el disco: borrar los
+  ficheros de las claves desalojadas es cosa de quien lo usa.
+"""
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+def atomic_write(path, content):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(content)
+        os.replace(tmp, path)
+    except BaseException:
+        remove_quietly(tmp)
+        raise
+
+
+def remove_quietly(*paths):
+    """Borra los ficheros ignorando los que ya no existen"""
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class DiskIndex:
+    """Índice LRU clave -> bytes con un presupuesto total en bytes"""
+
+    def __init__(self, budget):
+        self.budget = budget
+        self._lock = threading.Lock()
+        self._sizes = OrderedDict()
+        self._bytes = 0
+
+    def load(self, directory, suffix, size_of=os.path.getsize):
+        """Indexa los ficheros `<clave><suffix>` del directorio, de más antiguo a más reciente.
+
+        `size_of(path)` devuelve el tamaño que cuenta para el presupuesto; las
+        entradas que no se pueden leer se ignoran.
+        """
+        found = []
+        for name in os.listdir(directory):
+            if not name.endswith(suffix):
+                continue
+            path = os.path.join(directory, name)
+            try:
+                found.append((os.path.getmtime(path), name[:-len(suffix)], size_of(path)))
+            except (OSError, ValueError):
+                continue
+        with self._lock:
+            for _, key, size in sorted(found):
+                self._bytes -= self._sizes.pop(key, 0)
+                self._sizes[key] = size
+                self._bytes += size
+
+    def touch(self, key):
+        with self._lock:
+            if key in self._sizes:
+                self._sizes.move_to_end(key)
+
+    def add(self, key, size):
+        """Registra (o actualiza) la entrada y devuelve las claves desalojadas.
+
+        La entrada recién añadida nunca se desaloja, aunque por sí sola supere el presupuesto.
+        """
+        evicted = []
+        with self._lock:
+            self._bytes -= self._sizes.pop(key, 0)
+            self._sizes[key] = size
+            self._bytes += size
+            while self._bytes > self.budget and len(self._sizes) > 1:
+                old_key, old_size = self._sizes.popitem(last=False)
+                self._bytes -= old_size
+                evicted.append(old_key)
+        return evicted
+
+    def discard(self, key):
+        with self._lock:
+            self._bytes -= self._sizes.pop(key, 0)
+
+    def clear(self):
+        """Vacía el índice y devuelve las claves que tenía"""
+        with self._lock:
+            keys = list(self._sizes)
+            self._sizes.clear()
+            self._bytes = 0
+        return keys
+
+    def usage(self):
+        """(entradas, bytes)"""
+        with self._lock:
+            return len(self._sizes), self._bytes
@@ -0,0 +1,336 @@
+"""Caché de imágenes en dos niveles (memoria LRU + disco) con revalidación HTTP.
+
+Las entradas se indexan por URL y el contenido se guarda bajo una clave formada
+por la URL y el hash de los bytes, así que misma clave implica mismo contenido.
+Cuando una entrada vence se revalida con un GET condicional; si el servidor
+responde 304 se reutilizan los bytes guardados sin volver a descargarlos. Si el
+origen no responde o devuelve 5xx se sirve la copia vencida; si devuelve un 4xx
+definitivo (404, 410...) la entrada se elimina y se propaga el error.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import requests
+
+from disk_store import DiskIndex, atomic_write, remove_quietly
+
+DOWNLOAD_CHUNK_BYTES = 64 * 1024
+# Errores 4xx transitorios: con ellos se sigue sirviendo la copia vencida
+TRANSIENT_CLIENT_ERRORS = (408, 429)
+
+
+def _sha256(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _is_gone(error):
+    """True si el origen respondió con un 4xx definitivo (404, 410, 403...)"""
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None)
+    return (isinstance(error, requests.HTTPError) and status is not None
+            and 400 <= status < 500 and status not in TRANSIENT_CLIENT_ERRORS)
+
+
+class CacheEntry:
+    __slots__ = ('url', 'content', 'etag', 'last_modified', 'checked_at', 'blob_key')
+
+    def __init__(self, url, content, etag, last_modified, checked_at, blob_key=None):
+        self.url = url
+        self.content = content
+        self.etag = etag
+        self.last_modified = last_modified
+        self.checked_at = checked_at
+        if blob_key is None:
+            blob_key = _sha256(f"{url}\0{hashlib.sha256(content).hexdigest()}")
+        self.blob_key = blob_key
+
+    @property
+    def size(self):
+        return len(self.content)
+
+    def meta(self):
+        return {
+            'url': self.url,
+            'etag': self.etag,
+            'last_modified': self.last_modified,
+            'checked_at': self.checked_at,
+            'blob_key': self.blob_key,
+            'size': self.size,
+        }
+
+
+class ImageCache:
+    """Caché de imágenes descargadas por HTTP.
+
+    - `memory_budget` y `disk_budget` son límites en bytes; con `disk_dir=None`
+      sólo se usa el nivel en memoria.
+    - Las entradas más antiguas que `ttl` segundos se revalidan con
+      If-None-Match / If-Modified-Since.
+    - Las peticiones simultáneas de una misma URL comparten una única descarga.
+    - `timeout` limita cada lectura del socket; `max_time`, si se indica, limita
+      la descarga completa y la corta aunque el servidor siga enviando datos.
+    """
+
+    def __init__(self, session, timeout=10, ttl=3600, memory_budget=64 * 1024 * 1024,
+                 disk_dir=None, disk_budget=1024 * 1024 * 1024, max_time=None):
+        self.session = session
+        self.timeout = timeout
+        self.max_time = max_time
+        self.ttl = ttl
+        self.memory_budget = memory_budget
+        self.disk_dir = disk_dir
+        self.disk_budget = disk_budget
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()   # url -> CacheEntry
+        self._memory_bytes = 0
+        self._disk = DiskIndex(disk_budget)   # sha256(url) -> tamaño en bytes
+        self._inflight = {}            # url -> Future
+        self._stats = dict.fromkeys((
+            'memory_hits', 'disk_hits', 'misses', 'revalidated', 'refreshed',
+            'coalesced', 'stale_served', 'evictions', 'bytes_network', 'bytes_cache',
+        ), 0)
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._disk.load(disk_dir, '.json', self._meta_size)
+
+    # ------------------------------------------------------------------ API
+
+    def get(self, url):
+        """Devuelve los bytes de `url`, usando la caché cuando es posible"""
+        with self._lock:
+            future = self._inflight.get(url)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[url] = future
+            else:
+                self._stats['coalesced'] += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            content = self._get(url)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(content)
+            return content
+        finally:
+            with self._lock:
+                self._inflight.pop(url, None)
+
+    def stats(self):
+        """Contadores de aciertos, fallos y bytes, más el uso de cada nivel"""
+        disk_entries, disk_bytes = self._disk.usage()
+        with self._lock:
+            data = dict(self._stats)
+            data.update({
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'disk_entries': disk_entries,
+                'disk_bytes': disk_bytes,
+            })
+        served = data['bytes_network'] + data['bytes_cache']
+        data['byte_hit_ratio'] = data['bytes_cache'] / served if served else 0.0
+        return data
+
+    def clear(self):
+        """Vacía ambos niveles de la caché"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        for key in self._disk.clear():
+            self._remove_disk(key)
+
+    # ------------------------------------------------------------ interno
+
+    def _get(self, url):
+        entry = self._lookup(url)
+        if entry is not None and time.time() - entry.checked_at < self.ttl:
+            self._count('bytes_cache', entry.size)
+            return entry.content
+
+        if entry is None:
+            self._count('misses')
+
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+
+        try:
+            status, response_headers, content = self._download(url, headers)
+            if entry is not None and status == 304:
+                entry.checked_at = time.time()
+                self._store(entry)
+                self._count('revalidated')
+                self._count('bytes_cache', entry.size)
+                return entry.content
+        except Exception as e:
+            if entry is None:
+                raise
+            if _is_gone(e):
+                # El recurso ya no existe (o ya no es accesible): no se sigue sirviendo
+                self._evict(url)
+                raise
+            # Si el servidor no responde o falla (red, plazo, 5xx), se sirve la copia vencida
+            self._count('stale_served')
+            self._count('bytes_cache', entry.size)
+            return entry.content
+
+        if entry is not None:
+            self._count('refreshed')
+        self._count('bytes_network', len(content))
+        self._store(CacheEntry(url, content, response_headers.get('ETag'),
+                               response_headers.get('Last-Modified'), time.time()))
+        return content
+
+    def _download(self, url, headers):
+        """GET por partes que se aborta al superar `max_time`; devuelve (estado, cabeceras, bytes).
+
+        Cerrar la respuesta devuelve la conexión al pool aunque quien pidió la
+        imagen ya haya dejado de esperarla.
+        """
+        started = time.monotonic()
+        r = self.session.get(url, headers=headers, timeout=self.timeout, stream=True)
+        try:
+            if r.status_code == 304:
+                return r.status_code, r.headers, b''
+            r.raise_for_status()
+            chunks = []
+            while True:
+                # read1 hace como mucho una lectura del socket, así que el plazo se
+                # comprueba aunque el servidor envíe los datos muy despacio
+                chunk = r.raw.read1(DOWNLOAD_CHUNK_BYTES, decode_content=True)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                if self.max_time is not None and time.monotonic() - started > self.max_time:
+                    raise TimeoutError(f"Descarga de {url} cancelada tras {self.max_time:g}s")
+            return r.status_code, r.headers, b''.join(chunks)
+        finally:
+            r.close()
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def _lookup(self, url):
+        with self._lock:
+            entry = self._memory.get(url)
+            if entry is not None:
+                self._memory.move_to_end(url)
+                self._stats['memory_hits'] += 1
+                return entry
+
+        entry = self._read_disk(url)
+        if entry is not None:
+            self._count('disk_hits')
+            self._store_memory(entry)
+        return entry
+
+    def _evict(self, url):
+        with self._lock:
+            entry = self._memory.pop(url, None)
+            if entry is not None:
+                self._memory_bytes -= entry.size
+        if self.disk_dir:
+            key = _sha256(url)
+            self._disk.discard(key)
+            self._remove_disk(key)
+
+    def _store(self, entry):
+        self._store_memory(entry)
+        if self.disk_dir:
+            self._write_disk(entry)
+
+    def _store_memory(self, entry):
+        if entry.size > self.memory_budget:
+            return
+        with self._lock:
+            old = self._memory.pop(entry.url, None)
+            if old is not None:
+                self._memory_bytes -= old.size
+            self._memory[entry.url] = entry
+            self._memory_bytes += entry.size
+            while self._memory_bytes > self.memory_budget:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted.size
+                self._stats['evictions'] += 1
+
+    # --------------------------------------------------------------- disco
+
+    def _meta_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _blob_path(self, blob_key):
+        return os.path.join(self.disk_dir, f"{blob_key}.bin")
+
+    def _meta_size(self, path):
+        with open(path, encoding='utf-8') as fh:
+            return json.load(fh).get('size', 0)
+
+    def _read_disk(self, url):
+        if not self.disk_dir:
+            return None
+        key = _sha256(url)
+        try:
+            with open(self._meta_path(key), encoding='utf-8') as fh:
+                meta = json.load(fh)
+            with open(self._blob_path(meta['blob_key']), 'rb') as fh:
+                content = fh.read()
+        except (OSError, ValueError, KeyError):
+            return None
+        if meta.get('url') != url:
+            return None
+        os.utime(self._meta_path(key))
+        self._disk.touch(key)
+        return CacheEntry(url, content, meta.get('etag'), meta.get('last_modified'),
+                          meta.get('checked_at', 0), meta['blob_key'])
+
+    def _write_disk(self, entry):
+        if entry.size > self.disk_budget:
+            return
+        key = _sha256(entry.url)
+        try:
+            previous = None
+            try:
+                with open(self._meta_path(key), encoding='utf-8') as fh:
+                    previous = json.load(fh).get('blob_key')
+            except (OSError, ValueError):
+                pass
+            if not os.path.exists(self._blob_path(entry.blob_key)):
+                atomic_write(self._blob_path(entry.blob_key), entry.content)
+            atomic_write(self._meta_path(key), json.dumps(entry.meta()).encode('utf-8'))
+        except OSError:
+            return
+
+        if previous and previous != entry.blob_key:
+            remove_quietly(self._blob_path(previous))
+
+        evicted = self._disk.add(key, entry.size)
+        if evicted:
+            self._count('evictions', len(evicted))
+        for old_key in evicted:
+            self._remove_disk(old_key)
+
+    def _remove_disk(self, key):
+        try:
+            with open(self._meta_path(key), encoding='utf-8') as fh:
+                blob_key = json.load(fh).get('blob_key')
+        except (OSError, ValueError):
+            blob_key = None
+        remove_quietly(self._meta_path(key))
+        if blob_key:
+            remove_quietly(self._blob_path(blob_key))
@@ -0,0 +1,293 @@
+"""Motor de maquetación declarativo para las guías de especie.
+
+Una guía se describe con un `GuideLayout`: portada, secciones de tabla
+(`TableSection` con pares etiqueta/valor, `ListSection` con una fila por
+elemento) y la ruta de las imágenes. Al construirse, el layout compila todas
+las rutas de campos en un árbol (`RecordPaths`) que recorre el registro una sola
+vez por renderizado, y los estilos de tabla son objetos compartidos.
+
+El encabezado y el título de la portada se dibujan en línea: como form XObject
+cada página tendría que declararlo en su diccionario de recursos (sin comprimir)
+y el PDF resultante ocupa más que repitiendo unas pocas órdenes comprimidas.
+"""
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+from reportlab.platypus import Table, TableStyle
+
+import metrics
+
+# Estilo de las tablas etiqueta/valor (como la de colectores)
+KV_TABLE_STYLE = TableStyle([
+    ('ALIGN', (0,0), (0,-1), 'RIGHT'),
+    ('ALIGN', (1,0), (1,-1), 'LEFT'),
+    ('FONTNAME', (0,0), (-1,-1), 'Helvetica'),
+    ('FONTSIZE', (0,0), (-1,-1), 10),
+    ('VALIGN', (0,0), (-1,-1), 'TOP'),
+    ('GRID', (0,0), (-1,-1), 0.5, colors.black),
+    ('BOTTOMPADDING', (0,0), (-1,-1), 4),
+])
+
+# Estilo de las tablas con fila de cabecera (identificadores)
+LIST_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
+    ('TEXTCOLOR', (0,0), (-1,0), colors.black),
+    ('ALIGN', (0,0), (-1,-1), 'LEFT'),
+    ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0,0), (-1,-1), 10),
+    ('GRID', (0,0), (-1,-1), 0.5, colors.black),
+    ('BOTTOMPADDING', (0,0), (-1,-1), 4),
+])
+
+
+class RecordPaths:
+    """Rutas 'a.b.c' compiladas en un árbol; resolve() recorre el registro una sola vez.
+
+    Devuelve un dict ruta -> valor (None si falta algún nivel), incluidas las rutas
+    intermedias, de modo que 'species.genus.family' se visita una vez aunque la
+    usen varios campos.
+    """
+
+    def __init__(self, paths):
+        tree = {}
+        for path in paths:
+            node = tree
+            parts = path.split('.')
+            for i, key in enumerate(parts):
+                node = node.setdefault(key, ('.'.join(parts[:i+1]), {}))[1]
+        self._tree = self._freeze(tree)
+        self.paths = tuple(sorted(set(paths)))
+
+    def _freeze(self, tree):
+        return tuple((key, full, self._freeze(children)) for key, (full, children) in tree.items())
+
+    def resolve(self, data):
+        values = {}
+        stack = [(data, self._tree)]
+        while stack:
+            d, nodes = stack.pop()
+            for key, full, children in nodes:
+                value = d.get(key) if isinstance(d, dict) else None
+                values[full] = value
+                if children:
+                    stack.append((value, children))
+        return values
+
+
+class Field:
+    """Campo de una tabla: etiqueta, una o varias rutas y formato opcional.
+
+    Sin `format` el valor es el de la única ruta (o `default` si falta). Con
+    `format`, la función recibe los valores de todas las rutas (None si faltan)
+    y se encarga ella de los valores por defecto.
+    """
+
+    def __init__(self, label, paths, default='N/A', format=None):
+        self.label = label
+        self.paths = (paths,) if isinstance(paths, str) else tuple(paths)
+        self.default = default
+        self.format = format
+
+    def value(self, values):
+        if self.format is not None:
+            return self.format(*[values.get(path) for path in self.paths])
+        value = values.get(self.paths[0])
+        return self.default if value is None else value
+
+
+class TableSection:
+    """Sección con título y una tabla de pares etiqueta/valor"""
+
+    def __init__(self, title, fields, col_widths, style=KV_TABLE_STYLE):
+        self.title = title
+        self.fields = tuple(fields)
+        self.col_widths = tuple(col_widths)
+        self.style = style
+
+    @property
+    def paths(self):
+        return [path for field in self.fields for path in field.paths]
+
+    def rows(self, values):
+        return [[field.label, field.value(values)] for field in self.fields]
+
+
+class ListSection:
+    """Sección con una fila por elemento de la lista en `path` y fila de cabecera.
+
+    Las rutas de `columns` son relativas a cada elemento. La sección se omite si
+    la lista está vacía.
+    """
+
+    def __init__(self, title, path, columns, col_widths, style=LIST_TABLE_STYLE):
+        self.title = title
+        self.path = path
+        self.columns = tuple(columns)
+        self.col_widths = tuple(col_widths)
+        self.style = style
+        self._item_paths = RecordPaths([p for column in self.columns for p in column.paths])
+
+    @property
+    def paths(self):
+        return [self.path]
+
+    def rows(self, values):
+        items = values.get(self.path) or []
+        if not items:
+            return None
+        rows = [[column.label for column in self.columns]]
+        for item in items:
+            item_values = self._item_paths.resolve(item)
+            rows.append([column.value(item_values) for column in self.columns])
+        return rows
+
+
+def draw_header(c, width, height, title):
+    """Dibuja el encabezado minimalista en cada página"""
+    c.setFont('Helvetica', 10)
+    c.drawString(0.5*inch, height-0.5*inch, title)
+    c.line(0.5*inch, height-0.6*inch, width-0.5*inch, height-0.6*inch)
+
+
+def draw_table(c, table, x, y, avail_width, avail_height):
+    """Coloca la tabla con su borde superior en `y` y devuelve su altura"""
+    with metrics.stage('layout'):
+        table.wrapOn(c, avail_width, avail_height)
+        table.drawOn(c, x, y - table._height)
+    return table._height
+
+
+class GuideLayout:
+    """Descripción completa de una guía, compilada una sola vez.
+
+    - `name_path`, `subtitle_path` y `code_path` alimentan la portada y el encabezado.
+    - `sections` se dibujan en orden en la página de información.
+    - `images_path` apunta a la lista de imágenes del registro.
+    """
+
+    def __init__(self, title, name_path, subtitle_path, code_path, sections,
+                 images_path, filename_prefix):
+        self.title = title
+        self.name_path = name_path
+        self.subtitle_path = subtitle_path
+        self.code_path = code_path
+        self.sections = tuple(sections)
+        self.images_path = images_path
+        self.filename_prefix = filename_prefix
+        self.paths = RecordPaths(
+            [name_path, subtitle_path, code_path, images_path]
+            + [path for section in self.sections for path in section.paths])
+
+    def resolve(self, data):
+        return self.paths.resolve(data)
+
+    def name(self, values):
+        return values.get(self.name_path) or 'N/A'
+
+    def entry_label(self, values):
+        """Texto con el que el registro aparece en índices y marcadores"""
+        return f"{self.name(values)} ({values.get(self.code_path) or 'N/A'})"
+
+    def images(self, values):
+        return values.get(self.images_path) or []
+
+    def filename(self, values):
+        return f"{self.filename_prefix}_{self.name(values).replace(' ', '_')}.pdf"
+
+    def page_count(self, values):
+        """Páginas que ocupa un registro: portada, información y una por cada 2 imágenes"""
+        return 2 + (len(self.images(values)) + 1) // 2
+
+    def draw_cover(self, c, values, generated_at):
+        width, height = letter
+        c.setFont('Helvetica-Bold', 40)
+        c.drawCentredString(width/2, height/2 + 80, self.title)
+
+        c.setFont('Helvetica-Oblique', 30)
+        c.drawCentredString(width/2, height/2 + 40, self.name(values))
+        c.drawCentredString(width/2, height/2, values.get(self.subtitle_path) or 'N/A')
+
+        c.setFont('Helvetica', 16)
+        c.drawCentredString(width/2, height/2 - 40, f"Código: {values.get(self.code_path) or 'N/A'}")
+
+        # Pie de página
+        c.setFont('Helvetica', 10)
+        c.drawCentredString(width/2, 50, f"Generado el: {generated_at}")
+
+    def draw_sections(self, c, values):
+        """Dibuja el encabezado y todas las secciones de tabla en la página actual"""
+        width, height = letter
+        draw_header(c, width, height, self.name(values))
+        y = height - 1*inch
+
+        for section in self.sections:
+            rows = section.rows(values)
+            if not rows:
+                continue
+            c.setFont('Helvetica-Bold', 14)
+            c.drawString(1*inch, y, section.title)
+            y -= 30
+
+            table = Table(rows, colWidths=section.col_widths)
+            table.setStyle(section.style)
+            y -= draw_table(c, table, 1*inch, y, width-2*inch, height) + 20
+        return y
+
+
+def format_coordinates(lat, lon):
+    """Coordenadas redondeadas a 5 decimales"""
+    def fmt(value):
+        try:
+            return f"{float(value):.5f}"
+        except (TypeError, ValueError):
+            return 'N/A'
+    return f"Lat {fmt(lat)}, Long {fmt(lon)}"
+
+
+def format_date_time(date, time):
+    return f"{date or 'N/A'} {time or ''}"
+
+
+def format_person(firstname, lastname):
+    return f"{firstname or ''} {lastname or ''}".strip()
+
+
+AMPHIBIAN_GUIDE = GuideLayout(
+    title="GUÍA DE ESPECIE",
+    name_path='species.scientificName',
+    subtitle_path='species.commonName',
+    code_path='code',
+    images_path='files.images',
+    filename_prefix='guia_especie',
+    sections=[
+        TableSection("INFORMACIÓN GENERAL", [
+            Field("Código:", 'code'),
+            Field("Nombre científico:", 'species.scientificName'),
+            Field("Nombre común:", 'species.commonName'),
+            Field("Sexo:", 'sex.name'),
+            Field("Fecha identificación:", ('identDate', 'identTime'), format=format_date_time),
+            Field("Actividad:", 'activity.name'),
+            Field("Tipo de bosque:", 'forestType.name'),
+        ], [2*inch, 4*inch]),
+        TableSection("CLASIFICACIÓN TAXONÓMICA", [
+            Field("Clase:", 'species.genus.family.order.class.name'),
+            Field("Orden:", 'species.genus.family.order.name'),
+            Field("Familia:", 'species.genus.family.name'),
+            Field("Género:", 'species.genus.name'),
+            Field("Especie:", 'species.scientificName'),
+        ], [1.5*inch, 4.5*inch]),
+        TableSection("UBICACIÓN GEOGRÁFICA", [
+            Field("País:", 'ocurrence.event.locality.district.province.department.country.name'),
+            Field("Departamento:", 'ocurrence.event.locality.district.province.department.name'),
+            Field("Provincia:", 'ocurrence.event.locality.district.province.name'),
+            Field("Distrito:", 'ocurrence.event.locality.district.name'),
+            Field("Localidad:", 'ocurrence.event.locality.name'),
+            Field("Coordenadas:", ('ocurrence.event.latitude', 'ocurrence.event.longitude'),
+                  format=format_coordinates),
+        ], [1.5*inch, 4.5*inch]),
+        ListSection("IDENTIFICADORES", 'identifiers', [
+            Field("Nombre", ('person.firstname', 'person.lastname'), format=format_person),
+            Field("Email", 'person.email', default=''),
+        ], [3*inch, 3*inch]),
+    ],
+)
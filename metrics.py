@@ -0,0 +1,168 @@
+"""Instrumentación del renderizado: tiempos por etapa, contadores e histogramas.
+
+Las etapas se miden con `stage(nombre)`; cada medida va al histograma global y,
+si hay una petición en curso (`start_request`), también a sus tiempos, que luego
+se envían en la cabecera Server-Timing. `registry.render()` produce el formato
+de texto de Prometheus. Los valores son por proceso.
+"""
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SIZE_BUCKETS = (10e3, 50e3, 100e3, 250e3, 500e3, 1e6, 2.5e6, 5e6, 10e6, 25e6, 50e6)
+MEMORY_BUCKETS = (1e6, 5e6, 10e6, 25e6, 50e6, 100e6, 250e6, 500e6, 1e9)
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(f'{n}="{v}"' for n, v in zip(names, values)) + '}'
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(n, '')) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, buckets, labelnames=()):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}   # etiquetas -> [cuentas por bucket..., suma, total]
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(n, '')) for n in self.labelnames)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    data[i] += 1
+            data[-2] += value
+            data[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ('le',)
+        with self._lock:
+            for key, data in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, data):
+                    lines.append(f"{self.name}_bucket{_labels(names, key + (f'{bound:g}',))} {count}")
+                lines.append(f"{self.name}_bucket{_labels(names, key + ('+Inf',))} {data[-1]}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {data[-2]}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {data[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, name, help, labelnames=()):
+        metric = Counter(name, help, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, buckets, labelnames=()):
+        metric = Histogram(name, help, buckets, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        lines.extend([
+            "# HELP process_peak_rss_bytes Memoria residente máxima del proceso",
+            "# TYPE process_peak_rss_bytes gauge",
+            f"process_peak_rss_bytes {peak_rss_bytes()}",
+        ])
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+stage_seconds = registry.histogram(
+    'pdf_stage_seconds', 'Duración de cada etapa del renderizado', STAGE_BUCKETS, ('stage',))
+request_seconds = registry.histogram(
+    'pdf_request_seconds', 'Duración total de la petición', STAGE_BUCKETS, ('endpoint',))
+pdf_bytes = registry.histogram(
+    'pdf_output_bytes', 'Tamaño del PDF generado', SIZE_BUCKETS)
+images_total = registry.counter(
+    'pdf_images_total', 'Imágenes procesadas por resultado', ('result',))
+image_bytes_fetched = registry.counter(
+    'pdf_image_bytes_fetched_total', 'Bytes de imagen obtenidos (red o caché)')
+# Sólo con PROFILE_SAMPLE_RATE > 0. tracemalloc cuenta todos los hilos del proceso (otras
+# peticiones, descargas, trabajos), así que no es el pico de una petición, y no ve los
+# búferes nativos de Pillow. Para memoria real por proceso: process_peak_rss_bytes.
+sampled_heap_peak_bytes = registry.histogram(
+    'pdf_sampled_process_python_heap_peak_bytes',
+    'Pico del heap Python de todo el proceso mientras dura una petición muestreada',
+    MEMORY_BUCKETS, ('endpoint',))
+
+_current = ContextVar('request_timings', default=None)
+
+
+def peak_rss_bytes():
+    """Memoria residente máxima del proceso (ru_maxrss está en KB en Linux y en bytes en macOS)"""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def start_request():
+    """Empieza a acumular los tiempos por etapa de la petición actual"""
+    return _current.set({})
+
+
+def end_request(token):
+    """Devuelve los tiempos acumulados y deja de asociarlos a la petición"""
+    timings = _current.get() or {}
+    _current.reset(token)
+    return timings
+
+
+@contextmanager
+def stage(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stage_seconds.observe(elapsed, stage=name)
+        timings = _current.get()
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + elapsed
+
+
+def server_timing(timings):
+    """Valor de la cabecera Server-Timing a partir de los tiempos en segundos"""
+    return ', '.join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items())
@@ -0,0 +1,144 @@
+"""Caché de PDFs generados, indexada por un hash canónico del registro de entrada.
+
+Los PDFs se guardan en un LRU en memoria limitado en bytes; los que salen de
+memoria pasan a disco (si hay directorio configurado), también con un límite
+en bytes. Las entradas caducan tras `ttl` segundos para recoger cambios en las
+imágenes de origen.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from disk_store import DiskIndex, atomic_write, remove_quietly
+
+
+def canonical_key(data, *extra):
+    """Hash estable del registro (claves ordenadas) más parámetros de renderizado"""
+    payload = json.dumps([data, *extra], sort_keys=True, separators=(',', ':'),
+                         ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def content_etag(content):
+    """ETag fuerte derivado de los bytes del PDF"""
+    return hashlib.sha256(content).hexdigest()[:32]
+
+
+class PdfCache:
+    def __init__(self, memory_budget=128 * 1024 * 1024, disk_dir=None,
+                 disk_budget=1024 * 1024 * 1024, ttl=3600):
+        self.memory_budget = memory_budget
+        self.disk_dir = disk_dir
+        self.disk_budget = disk_budget
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()   # key -> (etag, filename, content, stored_at)
+        self._memory_bytes = 0
+        self._disk = DiskIndex(disk_budget)   # key -> tamaño en bytes
+        self._stats = dict.fromkeys(('hits', 'disk_hits', 'misses', 'evictions'), 0)
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._disk.load(disk_dir, '.pdf')
+
+    def get(self, key):
+        """Devuelve (etag, filename, content) o None si no está o ha caducado"""
+        now = time.time()
+        with self._lock:
+            item = self._memory.get(key)
+            if item is not None:
+                if now - item[3] < self.ttl:
+                    self._memory.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return item[:3]
+                self._memory_bytes -= len(item[2])
+                del self._memory[key]
+
+        item = self._read_disk(key)
+        if item is not None and now - item[3] < self.ttl:
+            with self._lock:
+                self._stats['hits'] += 1
+                self._stats['disk_hits'] += 1
+            return item[:3]
+
+        with self._lock:
+            self._stats['misses'] += 1
+        return None
+
+    def put(self, key, etag, filename, content):
+        spill = []
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_bytes -= len(old[2])
+            self._memory[key] = (etag, filename, content, time.time())
+            self._memory_bytes += len(content)
+            while self._memory_bytes > self.memory_budget and self._memory:
+                old_key, old = self._memory.popitem(last=False)
+                self._memory_bytes -= len(old[2])
+                spill.append((old_key, old))
+        # Lo que sale de memoria se vuelca a disco en lugar de perderse
+        for old_key, old in spill:
+            if self.disk_dir:
+                self._write_disk(old_key, *old)
+            else:
+                self._count('evictions')
+
+    def stats(self):
+        disk_entries, disk_bytes = self._disk.usage()
+        with self._lock:
+            data = dict(self._stats)
+            data.update({
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'disk_entries': disk_entries,
+                'disk_bytes': disk_bytes,
+            })
+        return data
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    # --------------------------------------------------------------- disco
+
+    def _paths(self, key):
+        return (os.path.join(self.disk_dir, f"{key}.json"),
+                os.path.join(self.disk_dir, f"{key}.pdf"))
+
+    def _read_disk(self, key):
+        if not self.disk_dir:
+            return None
+        meta_path, pdf_path = self._paths(key)
+        try:
+            with open(meta_path, encoding='utf-8') as fh:
+                meta = json.load(fh)
+            with open(pdf_path, 'rb') as fh:
+                content = fh.read()
+        except (OSError, ValueError):
+            return None
+        self._disk.touch(key)
+        return meta['etag'], meta['filename'], content, meta['stored_at']
+
+    def _write_disk(self, key, etag, filename, content, stored_at):
+        if len(content) > self.disk_budget:
+            self._count('evictions')
+            return
+        meta_path, pdf_path = self._paths(key)
+        meta = {'etag': etag, 'filename': filename, 'stored_at': stored_at}
+        try:
+            atomic_write(pdf_path, content)
+            atomic_write(meta_path, json.dumps(meta).encode('utf-8'))
+        except OSError:
+            self._count('evictions')
+            return
+
+        evicted = self._disk.add(key, len(content))
+        if evicted:
+            self._count('evictions', len(evicted))
+        for old_key in evicted:
+            remove_quietly(*self._paths(old_key))
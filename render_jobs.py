@@ -0,0 +1,180 @@
+"""Cola asíncrona de trabajos de renderizado.
+
+Cada trabajo se guarda en `job_dir` como `<id>.json` (estado y tiempos) y, al
+terminar, `<id>.pdf`. Al estar en disco, cualquier proceso de gunicorn puede
+responder a la consulta de estado o a la descarga, aunque el trabajo se haya
+encolado en otro. El límite de concurrencia y de profundidad es por proceso.
+"""
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from disk_store import atomic_write, remove_quietly
+
+JOB_ID_RE = re.compile(r'[0-9a-f]{32}')
+
+
+class QueueFull(Exception):
+    """La cola alcanzó su profundidad máxima"""
+
+
+class JobQueue:
+    def __init__(self, render, job_dir, concurrency=2, max_depth=50, ttl=3600):
+        """`render(record)` debe devolver (buffer, filename) como create_amphibian_pdf"""
+        self.render = render
+        self.job_dir = job_dir
+        self.max_depth = max_depth
+        self.ttl = ttl
+        os.makedirs(job_dir, exist_ok=True)
+
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='render-job')
+        self._lock = threading.Lock()
+        self._depth = 0      # encolados + en curso
+        self._running = 0
+        self._last_sweep = 0.0
+        self._active = set()  # trabajos de este proceso aún sin terminar
+        self._metrics = {
+            'submitted': 0, 'rejected': 0, 'completed': 0, 'failed': 0, 'expired': 0, 'abandoned': 0,
+            'queue_wait_seconds_sum': 0.0, 'queue_wait_seconds_max': 0.0,
+            'render_seconds_sum': 0.0, 'render_seconds_max': 0.0,
+        }
+
+    # ------------------------------------------------------------------ API
+
+    def submit(self, record):
+        """Encola el registro y devuelve el ID del trabajo; lanza QueueFull si no hay sitio"""
+        self.sweep()
+        with self._lock:
+            if self._depth >= self.max_depth:
+                self._metrics['rejected'] += 1
+                raise QueueFull()
+            self._depth += 1
+            self._metrics['submitted'] += 1
+
+        job_id = uuid.uuid4().hex
+        submitted_at = time.time()
+        with self._lock:
+            self._active.add(job_id)
+        try:
+            self._write_status(job_id, {'id': job_id, 'status': 'queued', 'submitted_at': submitted_at})
+            self._executor.submit(self._run, job_id, record, submitted_at)
+        except BaseException:
+            # Sin trabajo encolado no hay _run que libere el hueco
+            with self._lock:
+                self._depth -= 1
+                self._metrics['submitted'] -= 1
+                self._active.discard(job_id)
+            remove_quietly(self._path(job_id, 'json'))
+            raise
+        return job_id
+
+    def status(self, job_id):
+        """Estado del trabajo o None si no existe (o el ID no es válido)"""
+        if not JOB_ID_RE.fullmatch(job_id or ''):
+            return None
+        try:
+            with open(self._path(job_id, 'json'), encoding='utf-8') as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    def pdf_path(self, job_id):
+        return self._path(job_id, 'pdf')
+
+    def metrics(self):
+        with self._lock:
+            data = dict(self._metrics)
+            data['depth'] = self._depth
+            data['running'] = self._running
+            data['queued'] = self._depth - self._running
+            data['max_depth'] = self.max_depth
+        done = data['completed'] + data['failed']
+        data['queue_wait_seconds_avg'] = data['queue_wait_seconds_sum'] / done if done else 0.0
+        data['render_seconds_avg'] = data['render_seconds_sum'] / done if done else 0.0
+        return data
+
+    def sweep(self, force=False):
+        """Elimina los trabajos terminados hace más de `ttl` segundos.
+
+        Los que siguen 'queued' o 'running' más de `ttl` segundos sin pertenecer a
+        este proceso quedaron huérfanos (p. ej. se reinició el worker de gunicorn
+        que los tenía): se marcan como error y caducan como el resto.
+        """
+        now = time.time()
+        with self._lock:
+            if not force and now - self._last_sweep < min(self.ttl, 60):
+                return
+            self._last_sweep = now
+
+        expired = abandoned = 0
+        for name in os.listdir(self.job_dir):
+            job_id, _, ext = name.partition('.')
+            if ext != 'json' or not JOB_ID_RE.fullmatch(job_id):
+                continue
+            job = self.status(job_id)
+            if not job:
+                continue
+            if job.get('status') in ('queued', 'running'):
+                with self._lock:
+                    active = job_id in self._active
+                since = job.get('started_at') or job.get('submitted_at') or now
+                if not active and now - since > self.ttl:
+                    job.update(status='error', finished_at=now,
+                               error="El trabajo se interrumpió antes de terminar")
+                    try:
+                        self._write_status(job_id, job)
+                    except OSError:
+                        continue
+                    abandoned += 1
+                continue
+            if now - job.get('finished_at', now) > self.ttl:
+                remove_quietly(self._path(job_id, 'pdf'), self._path(job_id, 'json'))
+                expired += 1
+        if expired or abandoned:
+            with self._lock:
+                self._metrics['expired'] += expired
+                self._metrics['abandoned'] += abandoned
+
+    # ------------------------------------------------------------ interno
+
+    def _run(self, job_id, record, submitted_at):
+        started_at = time.time()
+        with self._lock:
+            self._running += 1
+        job = {'id': job_id, 'status': 'running', 'submitted_at': submitted_at, 'started_at': started_at}
+
+        try:
+            self._write_status(job_id, job)
+            pdf, filename = self.render(record)
+            atomic_write(self._path(job_id, 'pdf'), pdf.getvalue())
+            job.update(status='done', filename=filename)
+        except Exception as e:
+            job.update(status='error', error=str(e))
+
+        finished_at = time.time()
+        job['finished_at'] = finished_at
+        job['queue_wait_seconds'] = started_at - submitted_at
+        job['render_seconds'] = finished_at - started_at
+        try:
+            self._write_status(job_id, job)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._depth -= 1
+                self._active.discard(job_id)
+                m = self._metrics
+                m['completed' if job['status'] == 'done' else 'failed'] += 1
+                m['queue_wait_seconds_sum'] += job['queue_wait_seconds']
+                m['queue_wait_seconds_max'] = max(m['queue_wait_seconds_max'], job['queue_wait_seconds'])
+                m['render_seconds_sum'] += job['render_seconds']
+                m['render_seconds_max'] = max(m['render_seconds_max'], job['render_seconds'])
+
+    def _path(self, job_id, ext):
+        return os.path.join(self.job_dir, f"{job_id}.{ext}")
+
+    def _write_status(self, job_id, job):
+        atomic_write(self._path(job_id, 'json'), json.dumps(job, ensure_ascii=False).encode('utf-8'))
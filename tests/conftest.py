@@ -0,0 +1,58 @@
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class OriginStub:
+    """Servidor HTTP local cuyas respuestas se configuran por ruta.
+
+    `routes[path] = (estado, cuerpo, etag)`; con ETag responde 304 a un
+    If-None-Match que coincida. `hits[path]` cuenta las peticiones recibidas.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.hits = {}
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                stub.handle(self)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def url(self, path):
+        return f"{self.base_url}{path}"
+
+    def handle(self, request):
+        self.hits[request.path] = self.hits.get(request.path, 0) + 1
+        status, body, etag = self.routes.get(request.path, (404, b'', None))
+        if etag and request.headers.get('If-None-Match') == etag:
+            status, body = 304, b''
+        request.send_response(status)
+        if etag:
+            request.send_header('ETag', etag)
+        request.send_header('Content-Length', str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def origin():
+    stub = OriginStub()
+    yield stub
+    stub.close()
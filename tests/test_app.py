@@ -0,0 +1,78 @@
+from io import BytesIO
+
+import pytest
+from PIL import Image as PILImage
+
+import app as app_module
+from pdf_cache import PdfCache
+
+
+def jpeg(color):
+    buf = BytesIO()
+    PILImage.new('RGB', (60, 40), color).save(buf, format='JPEG')
+    return buf.getvalue()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(app_module, 'PDF_CACHE_ENABLED', True)
+    monkeypatch.setattr(app_module, 'pdf_cache', PdfCache())
+    app_module.image_cache.clear()
+    return app_module.app.test_client()
+
+
+def record(*urls):
+    return {'code': 'T1', 'species': {'scientificName': 'Boana test'},
+            'files': {'images': [{'name': url} for url in urls]}}
+
+
+def test_same_record_gives_same_etag_and_304(client, origin):
+    origin.routes['/a.jpg'] = (200, jpeg('red'), None)
+    data = record(origin.url('/a.jpg'))
+
+    first = client.post('/generate-pdf-from-data', json=data)
+    assert first.status_code == 200
+    second = client.post('/generate-pdf-from-data', json=data,
+                         headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 304
+
+
+def test_failed_images_give_stable_bytes(client, origin):
+    origin.routes['/roto.jpg'] = (200, b'no es una imagen', None)
+    data = record(origin.url('/roto.jpg'), 'http://127.0.0.1:1/caido.jpg')
+    data['files']['images'].append('sin-objeto')
+
+    etags = {client.post('/generate-pdf-from-data', json=data).headers['ETag'] for _ in range(3)}
+    assert len(etags) == 1
+
+
+def test_pdf_with_failed_image_is_not_cached(client, origin):
+    data = record(origin.url('/a.jpg'))
+
+    degraded = client.post('/generate-pdf-from-data', json=data)
+    assert degraded.status_code == 200
+    assert degraded.headers['Cache-Control'] == 'no-store'
+    assert app_module.pdf_cache.stats()['memory_entries'] == 0
+
+    origin.routes['/a.jpg'] = (200, jpeg('blue'), None)
+    complete = client.post('/generate-pdf-from-data', json=data)
+    assert complete.data != degraded.data
+    assert 'Cache-Control' not in complete.headers
+    assert app_module.pdf_cache.stats()['memory_entries'] == 1
+
+
+def test_zip_entry_names_are_flat():
+    assert app_module.zip_entry_name(3, 'guia_especie_N/A.pdf') == '0003_guia_especie_N_A.pdf'
+    assert app_module.zip_entry_name(1, '../../etc/passwd') == '0001_etc_passwd'
+
+
+def test_catalog_rejects_bad_input(client):
+    assert client.post('/generate-catalog', json={'individuals': {'a': 1}}).status_code == 400
+    assert client.post('/generate-catalog', json={'individuals': [{}], 'title': 5}).status_code == 400
+    assert client.post('/generate-catalog', json={'ids': [True]}).status_code == 400
+
+
+def test_catalog_filename_is_sanitized(client):
+    response = client.post('/generate-catalog', json={'individuals': [record()], 'title': 'x"; y=1\nz'})
+    assert response.status_code == 200
+    assert response.headers['Content-Disposition'] == 'attachment; filename="catalogo_x_y_1_z.pdf"'
@@ -0,0 +1,51 @@
+import os
+
+from disk_store import DiskIndex, atomic_write
+
+
+def test_atomic_write_replaces_without_leftovers(tmp_path):
+    path = str(tmp_path / 'a.bin')
+    atomic_write(path, b'uno')
+    atomic_write(path, b'dos')
+    with open(path, 'rb') as fh:
+        assert fh.read() == b'dos'
+    assert os.listdir(tmp_path) == ['a.bin']
+
+
+def test_add_evicts_least_recently_used():
+    index = DiskIndex(budget=300)
+    assert index.add('a', 100) == []
+    assert index.add('b', 100) == []
+    assert index.add('c', 100) == []
+    index.touch('a')
+    assert index.add('d', 100) == ['b']
+    assert index.usage() == (3, 300)
+
+
+def test_add_never_evicts_the_new_entry():
+    index = DiskIndex(budget=100)
+    index.add('a', 50)
+    assert index.add('b', 500) == ['a']
+    assert index.usage() == (1, 500)
+
+
+def test_updating_an_entry_replaces_its_size():
+    index = DiskIndex(budget=1000)
+    index.add('a', 100)
+    index.add('a', 300)
+    assert index.usage() == (1, 300)
+    index.discard('a')
+    assert index.usage() == (0, 0)
+
+
+def test_load_orders_by_mtime(tmp_path):
+    for i, name in enumerate(('viejo', 'medio', 'nuevo')):
+        path = tmp_path / f'{name}.pdf'
+        path.write_bytes(b'x' * 10)
+        os.utime(path, (1000 + i, 1000 + i))
+    (tmp_path / 'otro.json').write_text('{}')
+
+    index = DiskIndex(budget=25)
+    index.load(str(tmp_path), '.pdf')
+    assert index.usage() == (3, 30)
+    assert index.add('nuevo', 10) == ['viejo']
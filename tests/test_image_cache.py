@@ -0,0 +1,122 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from image_cache import ImageCache
+
+
+def make_cache(tmp_path=None, **kwargs):
+    kwargs.setdefault('ttl', 3600)
+    return ImageCache(requests.Session(), timeout=5,
+                      disk_dir=str(tmp_path) if tmp_path else None, **kwargs)
+
+
+def test_fresh_entry_is_served_from_memory(origin):
+    origin.routes['/a.jpg'] = (200, b'v1', None)
+    cache = make_cache()
+
+    assert cache.get(origin.url('/a.jpg')) == b'v1'
+    assert cache.get(origin.url('/a.jpg')) == b'v1'
+    assert origin.hits['/a.jpg'] == 1
+    assert cache.stats()['memory_hits'] == 1
+
+
+def test_expired_entry_revalidates_with_304(origin):
+    origin.routes['/a.jpg'] = (200, b'v1', '"e1"')
+    cache = make_cache(ttl=0)
+
+    cache.get(origin.url('/a.jpg'))
+    assert cache.get(origin.url('/a.jpg')) == b'v1'
+    stats = cache.stats()
+    assert stats['revalidated'] == 1
+    assert stats['bytes_network'] == 2
+
+
+def test_expired_entry_is_replaced_on_200(origin, tmp_path):
+    origin.routes['/a.jpg'] = (200, b'v1', None)
+    cache = make_cache(tmp_path, ttl=0)
+    cache.get(origin.url('/a.jpg'))
+
+    origin.routes['/a.jpg'] = (200, b'v2', None)
+    assert cache.get(origin.url('/a.jpg')) == b'v2'
+    assert cache.stats()['refreshed'] == 1
+    # Una caché nueva sobre el mismo directorio ve los bytes nuevos
+    assert make_cache(tmp_path).get(origin.url('/a.jpg')) == b'v2'
+
+
+def test_stale_copy_is_served_on_5xx(origin):
+    origin.routes['/a.jpg'] = (200, b'v1', None)
+    cache = make_cache(ttl=0)
+    cache.get(origin.url('/a.jpg'))
+
+    origin.routes['/a.jpg'] = (503, b'', None)
+    assert cache.get(origin.url('/a.jpg')) == b'v1'
+    assert cache.stats()['stale_served'] == 1
+
+
+def test_404_evicts_the_entry(origin, tmp_path):
+    origin.routes['/a.jpg'] = (200, b'v1', None)
+    cache = make_cache(tmp_path, ttl=0)
+    cache.get(origin.url('/a.jpg'))
+
+    origin.routes['/a.jpg'] = (404, b'', None)
+    with pytest.raises(requests.HTTPError):
+        cache.get(origin.url('/a.jpg'))
+    stats = cache.stats()
+    assert stats['memory_entries'] == 0
+    assert stats['disk_entries'] == 0
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_concurrent_requests_share_one_download(origin):
+    origin.routes['/a.jpg'] = (200, b'v1', None)
+    cache = make_cache()
+    release = threading.Event()
+    get = cache.session.get
+
+    def slow_get(*args, **kwargs):
+        release.wait(5)
+        return get(*args, **kwargs)
+
+    cache.session.get = slow_get
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get(origin.url('/a.jpg'))))
+               for _ in range(4)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert results == [b'v1'] * 4
+    assert origin.hits['/a.jpg'] == 1
+    assert cache.stats()['coalesced'] == 3
+
+
+def test_memory_and_disk_budgets_are_respected(origin, tmp_path):
+    for i in range(5):
+        origin.routes[f'/{i}.jpg'] = (200, bytes([i]) * 100, None)
+    cache = make_cache(tmp_path, memory_budget=250, disk_budget=300)
+
+    for i in range(5):
+        cache.get(origin.url(f'/{i}.jpg'))
+    stats = cache.stats()
+    assert stats['memory_bytes'] <= 250
+    assert stats['disk_bytes'] <= 300
+    assert stats['disk_entries'] == 3
+
+    # Lo más reciente sigue en disco y sobrevive a un reinicio
+    reloaded = make_cache(tmp_path, disk_budget=300)
+    assert reloaded.stats()['disk_entries'] == 3
+    assert reloaded.get(origin.url('/4.jpg')) == bytes([4]) * 100
+    assert reloaded.stats()['disk_hits'] == 1
+
+
+def test_download_longer_than_max_time_is_aborted(origin):
+    origin.routes['/a.jpg'] = (200, b'v1', None)
+    cache = make_cache(max_time=0)
+    with pytest.raises(TimeoutError):
+        cache.get(origin.url('/a.jpg'))
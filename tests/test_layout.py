@@ -0,0 +1,45 @@
+from layout import AMPHIBIAN_GUIDE, Field, ListSection, RecordPaths, format_coordinates
+
+
+def test_resolve_returns_leaves_and_intermediate_paths():
+    paths = RecordPaths(['a.b.c', 'a.b.d', 'e'])
+    values = paths.resolve({'a': {'b': {'c': 1, 'd': 2}}, 'e': 3})
+    assert values['a.b.c'] == 1
+    assert values['a.b.d'] == 2
+    assert values['a.b'] == {'c': 1, 'd': 2}
+    assert values['e'] == 3
+
+
+def test_resolve_tolerates_missing_and_non_dict_levels():
+    values = RecordPaths(['a.b.c', 'x']).resolve({'a': 'texto'})
+    assert values['a.b.c'] is None
+    assert values['x'] is None
+    assert RecordPaths(['a']).resolve(None) == {'a': None}
+
+
+def test_field_default_and_format():
+    assert Field('L', 'a').value({'a': None}) == 'N/A'
+    assert Field('L', 'a', default='').value({}) == ''
+    assert Field('L', ('a', 'b'), format=lambda a, b: f'{a}-{b}').value({'a': 1}) == '1-None'
+
+
+def test_list_section_rows():
+    section = ListSection('T', 'items', [Field('Nombre', 'person.name')], [100])
+    assert section.rows({'items': []}) is None
+    assert section.rows({'items': [{'person': {'name': 'Ana'}}, {}]}) == [['Nombre'], ['Ana'], ['N/A']]
+
+
+def test_format_coordinates():
+    assert format_coordinates(-3.123456789, '-73.2') == 'Lat -3.12346, Long -73.20000'
+    assert format_coordinates(None, 'x') == 'Lat N/A, Long N/A'
+
+
+def test_amphibian_guide_labels_and_pages():
+    values = AMPHIBIAN_GUIDE.resolve({
+        'code': 'C1',
+        'species': {'scientificName': 'Boana punctata'},
+        'files': {'images': [{'name': 'a'}, {'name': 'b'}, {'name': 'c'}]},
+    })
+    assert AMPHIBIAN_GUIDE.entry_label(values) == 'Boana punctata (C1)'
+    assert AMPHIBIAN_GUIDE.filename(values) == 'guia_especie_Boana_punctata.pdf'
+    assert AMPHIBIAN_GUIDE.page_count(values) == 4
@@ -0,0 +1,44 @@
+import time
+
+from pdf_cache import PdfCache, canonical_key
+
+
+def test_canonical_key_ignores_key_order():
+    assert canonical_key({'a': 1, 'b': {'c': 2}}) == canonical_key({'b': {'c': 2}, 'a': 1})
+    assert canonical_key({'a': 1}, '2024-01-01') != canonical_key({'a': 1}, '2024-01-02')
+
+
+def test_get_returns_what_was_put():
+    cache = PdfCache()
+    cache.put('k', 'etag', 'f.pdf', b'%PDF')
+    assert cache.get('k') == ('etag', 'f.pdf', b'%PDF')
+    assert cache.get('otra') is None
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_entries_expire_after_ttl():
+    cache = PdfCache(ttl=0.05)
+    cache.put('k', 'etag', 'f.pdf', b'%PDF')
+    time.sleep(0.1)
+    assert cache.get('k') is None
+    assert cache.stats()['memory_entries'] == 0
+
+
+def test_memory_overflow_spills_to_disk_within_budget(tmp_path):
+    cache = PdfCache(memory_budget=100, disk_dir=str(tmp_path), disk_budget=250)
+    for i in range(5):
+        cache.put(str(i), f'e{i}', 'f.pdf', b'x' * 100)
+
+    stats = cache.stats()
+    assert stats['memory_entries'] == 1
+    assert stats['disk_bytes'] <= 250
+    assert stats['evictions'] == 2
+    assert cache.get('3') == ('e3', 'f.pdf', b'x' * 100)
+    assert cache.stats()['disk_hits'] == 1
+    assert cache.get('0') is None
+
+    # El índice en disco se reconstruye al crear otra caché sobre el mismo directorio
+    reloaded = PdfCache(disk_dir=str(tmp_path), disk_budget=250)
+    assert reloaded.stats()['disk_entries'] == 2
+    assert reloaded.get('2') == ('e2', 'f.pdf', b'x' * 100)
@@ -0,0 +1,110 @@
+import json
+import threading
+import time
+import uuid
+from io import BytesIO
+
+import pytest
+
+from render_jobs import JobQueue, QueueFull
+
+
+def wait_for(queue, job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.status(job_id)
+        if job and job['status'] in ('done', 'error'):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"el trabajo {job_id} no terminó")
+
+
+def test_job_renders_to_disk(tmp_path):
+    queue = JobQueue(lambda record: (BytesIO(b'%PDF-' + record['code'].encode()), 'f.pdf'),
+                     str(tmp_path))
+    job_id = queue.submit({'code': 'A1'})
+
+    job = wait_for(queue, job_id)
+    assert job['status'] == 'done'
+    assert job['filename'] == 'f.pdf'
+    with open(queue.pdf_path(job_id), 'rb') as fh:
+        assert fh.read() == b'%PDF-A1'
+    assert queue.metrics()['completed'] == 1
+    assert queue.metrics()['depth'] == 0
+
+
+def test_render_error_is_recorded(tmp_path):
+    def render(record):
+        raise RuntimeError('sin imágenes')
+
+    queue = JobQueue(render, str(tmp_path))
+    job = wait_for(queue, queue.submit({}))
+    assert job['status'] == 'error'
+    assert job['error'] == 'sin imágenes'
+
+
+def test_submit_raises_queue_full_at_max_depth(tmp_path):
+    release = threading.Event()
+
+    def render(record):
+        release.wait(5)
+        return BytesIO(b'%PDF'), 'f.pdf'
+
+    queue = JobQueue(render, str(tmp_path), concurrency=1, max_depth=2)
+    first = queue.submit({})
+    queue.submit({})
+    with pytest.raises(QueueFull):
+        queue.submit({})
+    assert queue.metrics()['rejected'] == 1
+
+    release.set()
+    wait_for(queue, first)
+    assert queue.submit({})
+
+
+def test_failed_submit_releases_the_slot(tmp_path):
+    queue = JobQueue(lambda record: (BytesIO(b''), 'f.pdf'), str(tmp_path), max_depth=1)
+    queue._executor.shutdown()
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            queue.submit({})
+    assert queue.metrics()['depth'] == 0
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_status_rejects_invalid_ids(tmp_path):
+    queue = JobQueue(lambda record: (BytesIO(b''), 'f.pdf'), str(tmp_path))
+    assert queue.status('../../etc/passwd') is None
+    assert queue.status(uuid.uuid4().hex) is None
+
+
+def write_job(tmp_path, **job):
+    job_id = uuid.uuid4().hex
+    job['id'] = job_id
+    (tmp_path / f'{job_id}.json').write_text(json.dumps(job))
+    return job_id
+
+
+def test_sweep_expires_finished_jobs(tmp_path):
+    old = write_job(tmp_path, status='done', finished_at=time.time() - 100)
+    (tmp_path / f'{old}.pdf').write_bytes(b'%PDF')
+    recent = write_job(tmp_path, status='done', finished_at=time.time())
+
+    queue = JobQueue(lambda record: (BytesIO(b''), 'f.pdf'), str(tmp_path), ttl=50)
+    queue.sweep(force=True)
+    assert queue.status(old) is None
+    assert not (tmp_path / f'{old}.pdf').exists()
+    assert queue.status(recent)['status'] == 'done'
+    assert queue.metrics()['expired'] == 1
+
+
+def test_sweep_fails_orphaned_jobs(tmp_path):
+    orphan = write_job(tmp_path, status='running', submitted_at=time.time() - 100,
+                       started_at=time.time() - 100)
+    fresh = write_job(tmp_path, status='queued', submitted_at=time.time())
+
+    queue = JobQueue(lambda record: (BytesIO(b''), 'f.pdf'), str(tmp_path), ttl=50)
+    queue.sweep(force=True)
+    assert queue.status(orphan)['status'] == 'error'
+    assert queue.status(fresh)['status'] == 'queued'
+    assert queue.metrics()['abandoned'] == 1